@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the PDOK BGT custom-download API.
+
+Implements the job flow of ``/lv/bgt/download/v1_0/full/custom``: a POST
+creates a job, the status endpoint reports progress until a configurable
+generation latency has passed, and the download link serves a prepared
+archive, honouring HTTP Range requests.
+"""
+
+# Import necessary standard libraries
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FULL_PATH = "/lv/bgt/download/v1_0/full/custom"
+
+
+class PdokStandIn:
+    """
+    PDOK stand-in serving ``archive_path`` for every job, ``latency`` seconds
+    after the job was created. Use as a context manager or call start/stop.
+    """
+
+    def __init__(self, archive_path, latency=1.0, host='127.0.0.1', port=0):
+        self.archive_path = archive_path
+        self.latency = latency
+        self.jobs = {}
+        self.requests = []  # Payloads of all created jobs, for inspection
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+            def _send_json(self, status, body):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if self.path.rstrip('/') != FULL_PATH:
+                    return self._send_json(404, {'message': 'Not found'})
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+
+                job_id = str(uuid.uuid4())
+                with standin._lock:
+                    standin.jobs[job_id] = time.monotonic()
+                    standin.requests.append(payload)
+                self._send_json(202, {'downloadRequestId': job_id, '_links': {'status': {'href': f"{FULL_PATH}/{job_id}/status"}}})
+
+            def do_GET(self):
+                status_match = re.fullmatch(rf"{FULL_PATH}/([^/]+)/status", self.path)
+                download_match = re.fullmatch(rf"{FULL_PATH}/([^/]+)/download", self.path)
+                if status_match:
+                    return self._status(status_match.group(1))
+                if download_match:
+                    return self._download(download_match.group(1))
+                self._send_json(404, {'message': 'Not found'})
+
+            def _status(self, job_id):
+                created = standin.jobs.get(job_id)
+                if created is None:
+                    return self._send_json(404, {'message': 'Unknown download request'})
+
+                elapsed = time.monotonic() - created
+                if elapsed < standin.latency:
+                    progress = int(100 * elapsed / standin.latency) if standin.latency else 100
+                    return self._send_json(200, {'downloadRequestId': job_id, 'status': 'RUNNING', 'progress': progress})
+                self._send_json(201, {
+                    'downloadRequestId': job_id,
+                    'status': 'COMPLETED',
+                    'progress': 100,
+                    '_links': {'download': {'href': f"{FULL_PATH}/{job_id}/download"}},
+                })
+
+            def _download(self, job_id):
+                if job_id not in standin.jobs:
+                    return self._send_json(404, {'message': 'Unknown download request'})
+
+                size = os.path.getsize(standin.archive_path)
+                start = 0
+                range_match = re.fullmatch(r"bytes=(\d+)-", self.headers.get('Range', ''))
+                if range_match:
+                    start = int(range_match.group(1))
+                    if start >= size:
+                        self.send_response(416)
+                        self.send_header('Content-Range', f"bytes */{size}")
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f"bytes {start}-{size - 1}/{size}")
+                else:
+                    self.send_response(200)
+                self.send_header('Content-Type', 'application/zip')
+                self.send_header('Content-Length', str(size - start))
+                self.end_headers()
+
+                with open(standin.archive_path, 'rb') as f:
+                    f.seek(start)
+                    while True:
+                        chunk = f.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        self.wfile.write(chunk)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an archive through a local PDOK custom-download stand-in.")
+    parser.add_argument('archive', help="Zip file served for every download request")
+    parser.add_argument('--latency', type=float, default=5.0, help="Seconds before a job is ready")
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    standin = PdokStandIn(args.archive, args.latency, port=args.port)
+    print(f"PDOK stand-in listening on {standin.base_url}")
+    try:
+        standin.server.serve_forever()
+    except KeyboardInterrupt:
+        standin.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
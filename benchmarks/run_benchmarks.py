@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+"""
+Reproducible benchmarks for the BGT loader.
+
+Every scenario runs in its own process, so the recorded peak RSS belongs to
+that scenario alone. Scenarios:
+
+- ``clip``: clip_layer_to_polygon on one synthetic layer into a memory sink.
+- ``clip_vectorised``: the same with clip_layer_vectorised (needs shapely 2),
+  to compare the vectorised clip with the per-feature loop.
+- ``extract``: extract_and_load_data on a synthetic archive.
+- ``folder_output``: extract_and_load_data into a FlatGeobuf output folder,
+  checking that every layer is returned and loaded on completion.
+- ``end_to_end``: download_geodata against the local PDOK stand-in, with
+  per-stage timings of the status polling, download, load and clip.
+- ``import``: importing the plugin and registering its processing provider,
+  as at every QGIS and qgis_process start.
+- ``toolbox_open``: creating the download algorithm with its parameters, as
+  when its dialog is opened from the toolbox.
+
+All but the startup scenarios time the stages they pass through:
+check_status, download_data, load_layer and the clip functions all clipping
+goes through, clip_layer_to_areas and clip_layer_vectorised_to_areas.
+
+The startup scenarios also list which heavy modules (requests, NumPy,
+shapely, OGR) were imported by then; they run once, regardless of the
+feature and vertex counts.
+
+Needs the Python environment of a QGIS installation. Example:
+
+    python benchmarks/run_benchmarks.py --features 1000 10000 --output results.json
+
+With ``--smoke`` every scenario runs once on a small archive, and the run
+fails if a scenario writes no features or misses one of its stages.
+"""
+
+# Import necessary standard libraries
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from synthetic_bgt import generate_archive, grid_extent  # noqa: E402
+
+SCENARIOS = ('clip', 'clip_vectorised', 'extract', 'folder_output', 'end_to_end', 'import', 'toolbox_open')
+STARTUP_SCENARIOS = ('import', 'toolbox_open')
+HEAVY_MODULES = ('requests', 'numpy', 'shapely', 'osgeo.ogr')
+PLUGIN_PACKAGE = 'bgt_loader'
+# Stages a scenario must record besides a clip stage, checked with --smoke
+EXPECTED_STAGES = {
+    'extract': ('load_layer',),
+    'folder_output': ('load_layer',),
+    'end_to_end': ('check_status', 'download_data', 'load_layer'),
+}
+CLIP_STAGES = ('clip_layer_to_areas', 'clip_layer_vectorised_to_areas')
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB, or None if unknown.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def plugin_version():
+    with open(os.path.join(PLUGIN_DIR, 'metadata.txt'), encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('version='):
+                return line.split('=', 1)[1].strip()
+    return None
+
+
+def load_plugin(module_name='bgt_loader_algorithm'):
+    """
+    Import the plugin directory as a package, so its relative imports work,
+    and return one of its modules.
+    """
+    spec = importlib.util.spec_from_file_location(PLUGIN_PACKAGE, os.path.join(PLUGIN_DIR, '__init__.py'), submodule_search_locations=[PLUGIN_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PLUGIN_PACKAGE] = module
+    spec.loader.exec_module(module)
+    return importlib.import_module(f"{PLUGIN_PACKAGE}.{module_name}")
+
+
+def heavy_modules():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def run_startup_scenario(scenario):
+    """
+    Time the plugin start, or the opening of the download tool after it, in
+    this process and return the result record.
+    """
+    from qgis.core import QgsApplication, Qgis # type: ignore
+
+    qgs = QgsApplication([], False)
+    qgs.initQgis()
+    registry = QgsApplication.processingRegistry()
+    loaded_by_qgis = heavy_modules()
+    startup_timings = {}
+
+    start = time.perf_counter()
+    provider_module = load_plugin('bgt_loader_provider')
+    startup_timings['import'] = time.perf_counter() - start
+    start = time.perf_counter()
+    registry.addProvider(provider_module.BgtLoaderProvider())
+    startup_timings['register'] = time.perf_counter() - start
+
+    parameter_count = None
+    if scenario == 'import':
+        timings = startup_timings
+    else:
+        start = time.perf_counter()
+        algorithm = registry.createAlgorithmById('bgtloader:bgtloader')
+        parameter_count = len(algorithm.parameterDefinitions())
+        timings = {'toolbox_open': time.perf_counter() - start}
+    timings['total'] = sum(timings.values())
+
+    record = {
+        'scenario': scenario,
+        'parameters': parameter_count,
+        'timings_s': {name: round(value, 4) for name, value in timings.items()},
+        'heavy_modules_loaded_by_qgis': loaded_by_qgis,
+        'heavy_modules_loaded_by_plugin': [name for name in heavy_modules() if name not in loaded_by_qgis],
+        'peak_rss_mb': peak_rss_mb(),
+        'qgis_version': Qgis.version(),
+    }
+    qgs.exitQgis()
+    return record
+
+
+def area_of_interest(feature_count):
+    """
+    Square covering the middle half of the synthetic grid, as WKT.
+    """
+    xmin, ymin, xmax, ymax = grid_extent(feature_count)
+    dx = (xmax - xmin) * (1 - 0.5 ** 0.5) / 2
+    dy = (ymax - ymin) * (1 - 0.5 ** 0.5) / 2
+    x0, y0, x1, y1 = xmin + dx, ymin + dy, xmax - dx, ymax - dy
+    return f"POLYGON(({x0} {y0}, {x1} {y0}, {x1} {y1}, {x0} {y1}, {x0} {y0}))"
+
+
+def instrument(algorithm, method_names, timings):
+    """
+    Wrap methods of an algorithm instance to add their run time to
+    ``timings``. Methods that run concurrently add up their thread time.
+    """
+    for method_name in method_names:
+        method = getattr(algorithm, method_name)
+
+        def timed(*args, _method=method, _name=method_name, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                timings[_name] = timings.get(_name, 0.0) + time.perf_counter() - start
+
+        setattr(algorithm, method_name, timed)
+
+
+def count_features(result_paths, context):
+    """
+    Total feature count of the output layers of a run.
+    """
+    from qgis.core import QgsProcessingUtils # type: ignore
+    layers = [QgsProcessingUtils.mapLayerFromString(path, context) for path in result_paths.values()]
+    return sum(layer.featureCount() for layer in layers if layer is not None)
+
+
+def check_folder_output(outputs, layers, context):
+    """
+    Fail unless every layer of a folder output run was written, returned
+    as output and registered to be loaded on completion.
+    """
+    missing = [layer_name for layer_name in layers if layer_name not in outputs]
+    if missing:
+        raise AssertionError(f"Folder output did not return layers: {', '.join(missing)}")
+    to_load = context.layersToLoadOnCompletion()
+    for layer_name in layers:
+        if not os.path.exists(outputs[layer_name]):
+            raise AssertionError(f"Folder output did not write {outputs[layer_name]}")
+        if outputs[layer_name] not in to_load:
+            raise AssertionError(f"Folder output did not load layer {layer_name}")
+
+
+def run_scenario(scenario, features, vertices, latency, layers, workers, buffer_distance):
+    """
+    Run one scenario in this process and return its result record.
+    """
+    from qgis.core import QgsApplication, QgsProcessingContext, QgsProcessingFeedback, QgsVectorLayer, QgsWkbTypes, Qgis # type: ignore
+
+    qgs = QgsApplication([], False)
+    qgs.initQgis()
+    module = load_plugin()
+    from bgt_loader.bgt_loader_client import PdokClient, set_shared_client  # noqa: E402
+    from pdok_standin import PdokStandIn  # noqa: E402
+
+    work_dir = tempfile.mkdtemp(prefix='bgt_benchmark_')
+    zip_path = generate_archive(os.path.join(work_dir, 'synthetic.zip'), layers, features, vertices)
+    wkt_polygon = area_of_interest(features)
+
+    algorithm = module.BgtLoaderAlgorithm().create()
+    context = QgsProcessingContext()
+    feedback = QgsProcessingFeedback()
+    parameters = {
+        'buffer_distance': buffer_distance,
+        'use_cache': False,
+        'max_workers': workers,
+        'status_timeout_minutes': 60,
+        'tile_area_km2': 1000000,
+        'streaming_threshold_mb': 1024 * 1024,
+    }
+    parameters.update({layer_name: 'TEMPORARY_OUTPUT' for layer_name in layers})
+
+    timings = {}
+    features_out = 0
+    instrument(algorithm, ['check_status', 'download_data', 'load_layer', 'clip_layer_to_areas', 'clip_layer_vectorised_to_areas'], timings)
+
+    start = time.perf_counter()
+    if scenario in ('clip', 'clip_vectorised'):
+        layer = QgsVectorLayer(f"/vsizip/{zip_path}/bgt_{layers[0]}.gml", layers[0], "ogr")
+        clip_geometry = algorithm.prepare_clip_geometry(wkt_polygon, buffer_distance)
+        sink_layer = QgsVectorLayer(f"{QgsWkbTypes.displayString(algorithm.output_wkb_type(layer))}?crs=EPSG:28992", "sink", "memory")
+        sink_layer.dataProvider().addAttributes(layer.fields())
+        sink_layer.updateFields()
+        if scenario == 'clip':
+            features_out = algorithm.clip_layer_to_polygon(layer, clip_geometry, algorithm.create_clip_engine(clip_geometry), sink_layer.dataProvider(), feedback)
+        else:
+            features_out = algorithm.clip_layer_vectorised(layer, clip_geometry, sink_layer.dataProvider(), feedback)
+    elif scenario == 'extract':
+        result = algorithm.extract_and_load_data(zip_path, work_dir, wkt_polygon, feedback, buffer_distance, parameters, context)
+        features_out = count_features(result, context)
+    elif scenario == 'folder_output':
+        parameters['output_folder'] = os.path.join(work_dir, 'output')
+        algorithm.create_output_writer(parameters, context)
+        algorithm.extract_and_load_data(zip_path, work_dir, wkt_polygon, feedback, buffer_distance, parameters, context)
+        result = algorithm.finish_output_writer(context)
+        check_folder_output(result, layers, context)
+        features_out = count_features(result, context)
+    elif scenario == 'end_to_end':
+        with PdokStandIn(zip_path, latency) as standin:
+            set_shared_client(PdokClient(standin.base_url))
+            result = algorithm.download_geodata(wkt_polygon, work_dir, layers, feedback, parameters, context)
+        features_out = count_features(result, context)
+    timings['total'] = time.perf_counter() - start
+
+    record = {
+        'scenario': scenario,
+        'features_per_layer': features,
+        'vertices': vertices,
+        'layers': layers,
+        'workers': workers,
+        'latency_s': latency if scenario == 'end_to_end' else None,
+        'archive_bytes': os.path.getsize(zip_path),
+        'features_in': features * (1 if scenario.startswith('clip') else len(layers)),
+        'features_out': features_out,
+        'timings_s': {name: round(value, 4) for name, value in timings.items()},
+        'peak_rss_mb': peak_rss_mb(),
+        'run_report': algorithm.report.as_dict(),
+        'qgis_version': Qgis.version(),
+    }
+    qgs.exitQgis()
+    return record
+
+
+def smoke_problems(record):
+    """
+    Problems a smoke run looks for in the record of a scenario: no features
+    written, or a stage that was not timed.
+    """
+    if record['scenario'] in STARTUP_SCENARIOS:
+        return []
+    problems = []
+    if not record['features_out']:
+        problems.append("no features written")
+    timings = record['timings_s']
+    if not any(stage in timings for stage in CLIP_STAGES):
+        problems.append("no clip stage recorded")
+    problems.extend(f"no {stage} stage recorded" for stage in EXPECTED_STAGES.get(record['scenario'], ()) if stage not in timings)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the BGT loader benchmarks and write the results as JSON.")
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument('--features', nargs='+', type=int, default=[1000, 10000], help="Features per layer")
+    parser.add_argument('--vertices', nargs='+', type=int, default=[8], help="Vertices per polygon or line")
+    parser.add_argument('--layers', nargs='+', default=['pand', 'wegdeel'])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=1.0, help="Seconds the stand-in takes to generate a job")
+    parser.add_argument('--buffer', type=float, default=50.0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--smoke', action='store_true', help="Run every scenario once on a small archive and fail if one writes nothing or misses a stage")
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)  # Internal: run a single scenario in this process
+    args = parser.parse_args()
+
+    if args.run_one:
+        scenario, features, vertices = args.run_one.split(':')
+        if scenario in STARTUP_SCENARIOS:
+            print(json.dumps(run_startup_scenario(scenario)))
+            return
+        record = run_scenario(scenario, int(features), int(vertices), args.latency, args.layers, args.workers, args.buffer)
+        print(json.dumps(record))
+        return
+
+    if args.smoke:
+        args.features, args.vertices, args.latency = [200], [8], 0.1
+
+    results = {
+        'plugin_version': plugin_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'started': datetime.now(timezone.utc).isoformat(),
+        'results': [],
+    }
+    for scenario in args.scenarios:
+        if scenario in STARTUP_SCENARIOS:
+            command = [sys.executable, os.path.abspath(__file__), '--run-one', f"{scenario}:0:0"]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            record = json.loads(output.strip().splitlines()[-1])
+            results['results'].append(record)
+            print(f"{scenario:<12} total={record['timings_s']['total'] * 1000:.0f}ms heavy_modules={','.join(record['heavy_modules_loaded_by_plugin']) or '-'}")
+            continue
+        for features in args.features:
+            for vertices in args.vertices:
+                # A fresh process per scenario keeps peak RSS comparable
+                command = [
+                    sys.executable, os.path.abspath(__file__),
+                    '--run-one', f"{scenario}:{features}:{vertices}",
+                    '--layers', *args.layers,
+                    '--workers', str(args.workers),
+                    '--latency', str(args.latency),
+                    '--buffer', str(args.buffer),
+                ]
+                output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+                record = json.loads(output.strip().splitlines()[-1])
+                results['results'].append(record)
+                print(f"{scenario:<12} features={features:<8} vertices={vertices:<4} total={record['timings_s']['total']:.2f}s peak_rss={record['peak_rss_mb']}MB")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.smoke:
+        failures = [f"{record['scenario']}: {problem}" for record in results['results'] for problem in smoke_problems(record)]
+        if failures:
+            sys.exit("Smoke run failed:\n" + "\n".join(failures))
+        print("Smoke run passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Generator for synthetic PDOK gmllight archives.
+
+The archives mimic a PDOK custom download: a zip file with one
+``bgt_<layer>.gml`` member per featuretype. Polygon layers contain
+irregular polygons on a regular grid, line layers zigzag lines and point
+layers points, all in EPSG:28992 around a configurable origin.
+"""
+
+# Import necessary standard libraries
+import argparse
+import math
+import random
+import zipfile
+
+GML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<gml:FeatureCollection xmlns:gml="http://www.opengis.net/gml" '
+    'xmlns:imgeo="http://www.geostandaarden.nl/imgeo/2.1/light">\n'
+)
+GML_FOOTER = '</gml:FeatureCollection>\n'
+
+# Geometry type of the synthetic layers
+LAYER_GEOMETRIES = {
+    'pand': 'polygon',
+    'wegdeel': 'polygon',
+    'begroeidterreindeel': 'polygon',
+    'waterdeel': 'polygon',
+    'scheiding': 'line',
+    'paal': 'point',
+}
+
+ORIGIN = (120000.0, 487000.0)  # Amsterdam-ish, in RD New
+CELL_SIZE = 20.0  # Metres between features on the grid
+
+
+def _pos_list(coordinates):
+    return ' '.join(f"{x:.3f} {y:.3f}" for x, y in coordinates)
+
+
+def _polygon(rng, x, y, vertices):
+    # Irregular star-shaped ring inside the grid cell
+    ring = []
+    for i in range(vertices):
+        angle = 2 * math.pi * i / vertices
+        radius = CELL_SIZE * 0.4 * rng.uniform(0.6, 1.0)
+        ring.append((x + radius * math.cos(angle), y + radius * math.sin(angle)))
+    ring.append(ring[0])
+    return (
+        '<gml:Polygon srsName="urn:ogc:def:crs:EPSG::28992"><gml:exterior><gml:LinearRing>'
+        f'<gml:posList srsDimension="2">{_pos_list(ring)}</gml:posList>'
+        '</gml:LinearRing></gml:exterior></gml:Polygon>'
+    )
+
+
+def _line(rng, x, y, vertices):
+    step = CELL_SIZE / max(vertices - 1, 1)
+    line = [(x + i * step, y + rng.uniform(-CELL_SIZE / 4, CELL_SIZE / 4)) for i in range(max(vertices, 2))]
+    return (
+        '<gml:LineString srsName="urn:ogc:def:crs:EPSG::28992">'
+        f'<gml:posList srsDimension="2">{_pos_list(line)}</gml:posList>'
+        '</gml:LineString>'
+    )
+
+
+def _point(rng, x, y, vertices):
+    return f'<gml:Point srsName="urn:ogc:def:crs:EPSG::28992"><gml:pos>{x:.3f} {y:.3f}</gml:pos></gml:Point>'
+
+
+GEOMETRY_WRITERS = {'polygon': _polygon, 'line': _line, 'point': _point}
+
+
+def grid_extent(feature_count, origin=ORIGIN):
+    """
+    Extent (xmin, ymin, xmax, ymax) covered by a layer of the given size.
+    """
+    side = math.ceil(math.sqrt(feature_count))
+    return origin[0], origin[1], origin[0] + side * CELL_SIZE, origin[1] + side * CELL_SIZE
+
+
+def write_layer(f, layer_name, feature_count, vertices, rng, origin=ORIGIN):
+    """
+    Write one gmllight layer to an open text stream.
+    """
+    write_geometry = GEOMETRY_WRITERS[LAYER_GEOMETRIES.get(layer_name, 'polygon')]
+    side = math.ceil(math.sqrt(feature_count))
+    element = layer_name.capitalize()
+
+    f.write(GML_HEADER)
+    for i in range(feature_count):
+        x = origin[0] + (i % side + 0.5) * CELL_SIZE
+        y = origin[1] + (i // side + 0.5) * CELL_SIZE
+        # Every tenth object is historic, so lifecycle filters have work to do
+        end_registration = '<imgeo:eindRegistratie>2021-01-01T00:00:00</imgeo:eindRegistratie>' if i % 10 == 9 else ''
+        f.write(
+            f'<gml:featureMember><imgeo:{element} gml:id="{layer_name}.{i}">'
+            f'<imgeo:lokaalID>G0000.{layer_name}{i:012d}</imgeo:lokaalID>'
+            '<imgeo:objectBeginTijd>2015-01-01</imgeo:objectBeginTijd>'
+            '<imgeo:tijdstipRegistratie>2015-01-01T00:00:00</imgeo:tijdstipRegistratie>'
+            f'{end_registration}'
+            '<imgeo:bronhouder>G0000</imgeo:bronhouder>'
+            '<imgeo:bgt-status>bestaand</imgeo:bgt-status>'
+            f'<imgeo:plus-type>{"waardeOnbekend" if i % 3 else "gemengd"}</imgeo:plus-type>'
+            f'<imgeo:geometrie>{write_geometry(rng, x, y, vertices)}</imgeo:geometrie>'
+            f'</imgeo:{element}></gml:featureMember>\n'
+        )
+    f.write(GML_FOOTER)
+
+
+def generate_archive(zip_path, layers, feature_count, vertices=8, seed=42, origin=ORIGIN):
+    """
+    Write a synthetic PDOK custom-download archive and return its path.
+    """
+    rng = random.Random(seed)
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for layer_name in layers:
+            with archive.open(f"bgt_{layer_name}.gml", 'w', force_zip64=True) as member:
+                with _TextWriter(member) as f:
+                    write_layer(f, layer_name, feature_count, vertices, rng, origin)
+    return zip_path
+
+
+class _TextWriter:
+    """
+    Buffered UTF-8 text writer on top of a binary zip member.
+    """
+
+    def __init__(self, binary, buffer_size=1024 * 1024):
+        self.binary = binary
+        self.buffer_size = buffer_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.binary.write(''.join(self.parts).encode('utf-8'))
+        self.parts = []
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic PDOK gmllight archive.")
+    parser.add_argument('output', help="Path of the zip file to write")
+    parser.add_argument('--layers', nargs='+', default=['pand', 'wegdeel'], choices=sorted(LAYER_GEOMETRIES))
+    parser.add_argument('--features', type=int, default=10000, help="Features per layer")
+    parser.add_argument('--vertices', type=int, default=8, help="Vertices per polygon or line")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    generate_archive(args.output, args.layers, args.features, args.vertices, args.seed)
+
+
+if __name__ == '__main__':
+    main()
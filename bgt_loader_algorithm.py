@@ -16,33 +16,59 @@
 
 # Import necessary QGIS libraries
 from qgis.core import ( # type: ignore
+    QgsAbstractGeometry,
+    QgsApplication,
     QgsProcessingAlgorithm,
+    QgsProcessingContext,
+    QgsProcessingParameterBoolean,
+    QgsProcessingParameterDefinition,
+    QgsProcessingParameterFile,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterFileDestination,
+    QgsProcessingParameterFolderDestination,
     QgsProcessingParameterFeatureSource,
     QgsCoordinateReferenceSystem,
     QgsProcessingParameterNumber,
+    QgsProcessingParameterString,
     QgsProcessingParameterFeatureSink,
     QgsFeatureSink,
     QgsVectorLayer,
     QgsWkbTypes,
     QgsFeature,
+    QgsFeatureRequest,
+    QgsExpression,
+    QgsField,
+    QgsFields,
     QgsGeometry,
-    QgsVectorFileWriter,
+    QgsSpatialIndex,
     QgsProcessingException,
     QgsCoordinateTransform,
     QgsCoordinateReferenceSystem,
     QgsProject,
+    QgsRectangle,
     QgsProcessing
 )
 
-from qgis.PyQt.QtCore import QCoreApplication # type: ignore
+from qgis.PyQt.QtCore import QCoreApplication, QVariant # type: ignore
 
 # Import necessary standard libraries
-import requests
 import time
 import os
 import zipfile
-import tempfile
-from datetime import datetime
+import threading
+import math
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import nullcontext
+
+# Modules needing requests, OGR or shapely are imported where they are used,
+# so loading the plugin at QGIS start does not pay for them
+from .bgt_loader_cache import BgtDownloadCache
+from .bgt_loader_catalogue import layer_names
+from .bgt_loader_coordinator import RequestCoordinator, shared_coordinator
+from .bgt_loader_report import RunReport
+from .bgt_loader_store import BgtLocalStore
+from .bgt_loader_threads import AlgorithmThreadCalls, LockedFeedback
+from .bgt_loader_workspace import ScratchWorkspace
 
 
 class BgtLoaderAlgorithm(QgsProcessingAlgorithm):
@@ -50,21 +76,53 @@ class BgtLoaderAlgorithm(QgsProcessingAlgorithm):
     QGIS processing tool for downloading Dutch BGT-data within a selected polygon.
     """
 
-    # Define the available layers for download from BGT
-    layers = [
-        'bak', 'begroeidterreindeel', 'bord', 'buurt', 'functioneelgebied',
-        'gebouwinstallatie', 'installatie', 'kast', 'kunstwerkdeel', 'mast',
-        'onbegroeidterreindeel', 'ondersteunendwaterdeel', 'ondersteunendwegdeel',
-        'ongeclassificeerdobject', 'openbareruimte', 'openbareruimtelabel',
-        'overbruggingsdeel', 'overigbouwwerk', 'overigescheiding', 'paal', 'pand',
-        'plaatsbepalingspunt', 'put', 'scheiding', 'sensor', 'spoor', 'stadsdeel',
-        'straatmeubilair', 'tunneldeel', 'vegetatieobject', 'waterdeel',
-        'waterinrichtingselement', 'waterschap', 'wegdeel', 'weginrichtingselement', 'wijk'
-    ]
-
     # Define constants
     temp_dir = 'temp_dir'  # Directory for temporary files
     POLYGON = 'POLYGON'  # Parameter for input polygon
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes written to disk per chunk
+    DOWNLOAD_MAX_RETRIES = 5  # Resume attempts for an interrupted download
+    DOWNLOAD_TIMEOUT = 60  # Seconds without data before a download is considered dropped
+    STATUS_POLL_MIN_INTERVAL = 0.5  # Seconds before the first status check
+    STATUS_POLL_MAX_INTERVAL = 15  # Upper bound of the backed-off status check interval
+    STATUS_REQUEST_TIMEOUT = (5, 5)  # Connect and read timeout of a status check; a canceled check is abandoned sooner
+    CANCEL_CHECK_INTERVAL = 0.2  # Seconds between cancellation checks while waiting
+    SINK_BATCH_SIZE = 5000  # Clipped features buffered before each sink write
+    IMPORT_STREAMING_THRESHOLD = 256 * 1024 * 1024  # GML files above this size are streamed when importing an extract
+    BATCH_MAX_REQUESTS = 4  # PDOK requests running at the same time in a run, see request_archive
+    SOURCE_ID_FIELD = 'source_fid'  # Attribute linking output to the input feature in batch mode
+    LOKAAL_ID_FIELD = 'lokaalID'  # BGT object identifier, used to de-duplicate tiled downloads
+    END_REGISTRATION_FIELD = 'eindRegistratie'  # Set on BGT objects that are no longer current
+    STATUS_FIELD = 'bgt-status'  # Filtered with the bgt_status parameter
+    PLUS_TYPE_FIELD = 'plus-type'  # Filtered with the plus_type parameter
+    # Output geometry settings, see create_output_profile
+    DEFAULT_OUTPUT_PROFILE = {'grid_size': 0.0, 'curve_tolerance': 0.0, 'buffer_segments': 1}
+    # Formats of the output folder, with their writers
+    FOLDER_FORMATS = [('FlatGeobuf', 'FlatGeobufWriter'), ('GeoParquet', 'GeoParquetWriter')]
+    FULL_PATH = "/lv/bgt/download/v1_0/full/custom"
+    DELTA_PATH = "/lv/bgt/download/v1_0/delta"
+
+    def __init__(self):
+        super().__init__()
+        # Timings of the current run, see processAlgorithm
+        self.report = RunReport()
+        # Writes all layers into one GeoPackage instead of the sinks, if set
+        self.output_writer = None
+        # Attribute filters and field selection applied when reading, see create_read_filter
+        self.read_filter = None
+        # Output geometry settings, see create_output_profile
+        self.output_profile = dict(self.DEFAULT_OUTPUT_PROFILE)
+        # Scratch directory of the current run, see processAlgorithm
+        self.workspace = None
+        # Bypass the download cache and shared requests, and raise when a
+        # download fails instead of skipping it, see update_local_store
+        self.fresh_downloads = False
+        # Runs the calls of worker threads that touch the context, see processAlgorithm
+        self.algorithm_calls = AlgorithmThreadCalls()
+        # Limits the PDOK requests of a run, however its worker pools nest
+        self.request_slots = threading.Semaphore(self.BATCH_MAX_REQUESTS)
+        # Progress PDOK reported per download request of the run, see report_status_progress
+        self.status_progress = {}
+        self.status_progress_lock = threading.Lock()
 
     def initAlgorithm(self, config):
         """
@@ -76,8 +134,62 @@ class BgtLoaderAlgorithm(QgsProcessingAlgorithm):
         # Input: Buffer distance for polygon
         self.addParameter(QgsProcessingParameterNumber('buffer_distance', 'Bufferbreedte in meters:', defaultValue=200.0))
 
-        # Output: Define feature sinks for each selected BGT layer
-        for layer in self.layers:
+        # Input: Process every feature of the polygon layer instead of only the first
+        self.addParameter(QgsProcessingParameterBoolean('batch_mode', 'Verwerk alle features uit de laag (batchmodus)', defaultValue=False))
+
+        # Input: Number of layers processed in parallel
+        self.addParameter(QgsProcessingParameterNumber('max_workers', 'Aantal lagen tegelijk verwerken:', type=QgsProcessingParameterNumber.Integer, defaultValue=min(4, os.cpu_count() or 1), minValue=1))
+
+        # Input: Local cache of earlier PDOK downloads
+        self.addParameter(QgsProcessingParameterBoolean('use_cache', 'Gebruik lokale cache van eerdere downloads', defaultValue=True))
+        advanced_parameters = [
+            QgsProcessingParameterNumber('cache_ttl_hours', 'Geldigheid van de cache in uren:', defaultValue=24.0, minValue=0.0),
+            QgsProcessingParameterNumber('cache_max_size_mb', 'Maximale grootte van de cache in MB:', type=QgsProcessingParameterNumber.Integer, defaultValue=2048, minValue=0),
+        ]
+        # Input: Maximum time to wait for PDOK to generate a download
+        advanced_parameters.append(QgsProcessingParameterNumber('status_timeout_minutes', 'Maximale wachttijd op PDOK in minuten:', defaultValue=60.0, minValue=1.0))
+        # Input: GML files above this size are read with the streaming reader instead of OGR
+        advanced_parameters.append(QgsProcessingParameterNumber('streaming_threshold_mb', 'Grootte in MB vanaf waar GML gestreamd wordt ingelezen:', type=QgsProcessingParameterNumber.Integer, defaultValue=1024, minValue=0))
+        # Input: Maximum area of a single PDOK request before the area is tiled
+        advanced_parameters.append(QgsProcessingParameterNumber('tile_area_km2', 'Maximale oppervlakte per PDOK-verzoek in km²:', defaultValue=25.0, minValue=0.1))
+        # Input: Split the layers over separate PDOK requests, so layers are processed as soon as their download is ready
+        advanced_parameters.append(QgsProcessingParameterNumber('layers_per_request', 'Aantal lagen per PDOK-verzoek (0 = alle lagen in één verzoek):', type=QgsProcessingParameterNumber.Integer, defaultValue=0, minValue=0))
+        # Input: Maximum disk space of the scratch files of a run
+        advanced_parameters.append(QgsProcessingParameterNumber('scratch_budget_mb', 'Maximale schijfruimte voor tijdelijke bestanden in MB (0 = onbeperkt):', type=QgsProcessingParameterNumber.Integer, defaultValue=0, minValue=0))
+        # Input: Output profile for lighter geometries: coordinate grid, curve linearisation and buffer smoothness
+        advanced_parameters.append(QgsProcessingParameterNumber('grid_size', 'Coördinaten afronden op raster in meters (0 = niet afronden):', type=QgsProcessingParameterNumber.Double, defaultValue=0.0, minValue=0.0))
+        advanced_parameters.append(QgsProcessingParameterNumber('curve_tolerance', 'Maximale afwijking bij het omzetten van bogen in meters (0 = standaard):', type=QgsProcessingParameterNumber.Double, defaultValue=0.0, minValue=0.0))
+        advanced_parameters.append(QgsProcessingParameterNumber('buffer_segments', 'Aantal segmenten per kwartcirkel van de buffer:', type=QgsProcessingParameterNumber.Integer, defaultValue=1, minValue=1))
+        # Input: Clip whole batches of geometries at once instead of feature by feature (needs shapely 2)
+        advanced_parameters.append(QgsProcessingParameterBoolean('vectorised_clip', 'Geometrieën in blokken knippen (vereist shapely 2)', defaultValue=False))
+        for parameter in advanced_parameters:
+            parameter.setFlags(parameter.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+            self.addParameter(parameter)
+
+        # Input: Filters applied while reading, so unneeded objects and attributes are never loaded
+        self.addParameter(QgsProcessingParameterBoolean('current_only', 'Alleen actuele objecten (zonder eindRegistratie)', defaultValue=False))
+        self.addParameter(QgsProcessingParameterString('bgt_status', 'Toegestane waarden van bgt-status, kommagescheiden (optioneel):', optional=True))
+        self.addParameter(QgsProcessingParameterString('plus_type', 'Toegestane waarden van plus-type, kommagescheiden (optioneel):', optional=True))
+        self.addParameter(QgsProcessingParameterString('fields', 'Op te nemen velden, kommagescheiden (optioneel, standaard alle):', optional=True))
+
+        # Input: Local BGT extract to clip from instead of downloading from PDOK
+        self.addParameter(QgsProcessingParameterFile('offline_store', 'Lokale BGT-extract in plaats van PDOK (optioneel):', extension='gpkg', optional=True))
+
+        # Input: Persistent local store that is kept up to date with the BGT delta downloads
+        self.addParameter(QgsProcessingParameterFileDestination('store_path', 'Lokale opslag voor incrementele updates (optioneel):', fileFilter='GeoPackage (*.gpkg)', optional=True, createByDefault=False))
+
+        # Output: Optional single GeoPackage receiving all selected layers instead of the separate outputs
+        self.addParameter(QgsProcessingParameterFileDestination('geopackage', 'Alle lagen in één GeoPackage (optioneel):', fileFilter='GeoPackage (*.gpkg)', optional=True, createByDefault=False))
+
+        # Output: Optional folder receiving one FlatGeobuf or GeoParquet file per layer
+        self.addParameter(QgsProcessingParameterEnum('output_folder_format', 'Bestandsformaat voor de uitvoermap:', options=[name for name, _ in self.FOLDER_FORMATS], defaultValue=0))
+        self.addParameter(QgsProcessingParameterFolderDestination('output_folder', 'Alle lagen als bestanden in een map (optioneel):', optional=True, createByDefault=False))
+
+        # Output: Optional JSON report with the timings of the run
+        self.addParameter(QgsProcessingParameterFileDestination('report', 'Rapport met doorlooptijden (JSON, optioneel):', fileFilter='JSON (*.json)', optional=True, createByDefault=False))
+
+        # Output: Define feature sinks for each BGT layer in the catalogue
+        for layer in layer_names():
             self.addParameter(QgsProcessingParameterFeatureSink(layer, f"{layer}", QgsProcessing.TypeVectorAnyGeometry, createByDefault=False, optional=True))
 
     def processAlgorithm(self, parameters, context, feedback):
@@ -86,9 +198,25 @@ class BgtLoaderAlgorithm(QgsProcessingAlgorithm):
         - Extract polygon geometry.
         - Download and process BGT layers.
         """
-        # Create persistent temporary directory to avoid deletion errors
-        temp_dir = tempfile.mkdtemp()  
-        feedback.pushInfo(f"Using persistent temporary directory: {temp_dir}")
+        # Workers report through the feedback and hand context work to this thread
+        feedback = LockedFeedback(feedback)
+        self.algorithm_calls = AlgorithmThreadCalls()
+        self.request_slots = threading.Semaphore(self.BATCH_MAX_REQUESTS)
+        self.status_progress = {}
+
+        self.report = RunReport()
+        self.output_writer = None
+        self.fresh_downloads = False
+        self.read_filter = self.create_read_filter(parameters, context)
+        self.output_profile = self.create_output_profile(parameters, context)
+
+        # Remove the scratch workspaces of crashed runs, then create the one of this run
+        for orphan_path in ScratchWorkspace.sweep_orphans():
+            feedback.pushInfo(f"Removed orphaned scratch workspace: {orphan_path}")
+        scratch_budget = self.parameterAsInt(parameters, 'scratch_budget_mb', context) * 1024 * 1024
+        self.workspace = ScratchWorkspace(budget_bytes=scratch_budget)
+        temp_dir = self.workspace.path
+        feedback.pushInfo(f"Using scratch workspace: {temp_dir}")
 
         try:
             # Get input polygon feature source
@@ -96,9 +224,11 @@ class BgtLoaderAlgorithm(QgsProcessingAlgorithm):
             if not polygon_source:
                 raise QgsProcessingException("Invalid polygon layer.")
 
-            # Extract the geometry of the first valid polygon feature
+            # Extract the geometry of the first valid polygon feature, or of all
+            # features in batch mode
+            batch_mode = self.parameterAsBool(parameters, 'batch_mode', context)
             features = polygon_source.getFeatures()
-            wkt_polygon = ""
+            source_areas = []
 
             target_crs = QgsCoordinateReferenceSystem("EPSG:28992")
             source_crs = polygon_source.sourceCrs()
@@ -108,121 +238,831 @@ class BgtLoaderAlgorithm(QgsProcessingAlgorithm):
                 if feature.isValid():
                     geom = feature.geometry()
                     geom.transform(transform)
-                    wkt_polygon = geom.asWkt()
-                    break
+                    source_areas.append((feature.id(), geom.asWkt()))
+                    if not batch_mode:
+                        break
 
-            if not wkt_polygon:
+            if not source_areas:
                 raise QgsProcessingException("No valid polygon geometry found.")
 
             # Get the list of selected layers
-            selected_layers = [layer for layer in self.layers if parameters.get(layer) is not None]
+            selected_layers = [layer for layer in layer_names() if parameters.get(layer) is not None]
             feedback.pushInfo(f"Geselecteerde lagen: {', '.join(selected_layers)}")
 
+            # Write all layers into one GeoPackage or a folder of files if requested
+            output_key, output_path = self.create_output_writer(parameters, context)
+
             # Download and process BGT data
-            result = self.download_geodata(wkt_polygon, temp_dir, selected_layers, feedback, parameters, context)
+            store_path = self.parameterAsFileOutput(parameters, 'store_path', context)
+            if store_path:
+                if batch_mode:
+                    raise QgsProcessingException("A local store holds a single area and cannot be combined with batch mode.")
+                if self.parameterAsFile(parameters, 'offline_store', context):
+                    raise QgsProcessingException("A local store is updated from PDOK and cannot be combined with a local extract.")
+                result = self.update_local_store(store_path, source_areas[0][1], temp_dir, selected_layers, feedback, parameters, context)
+            elif batch_mode:
+                result = self.download_batch(source_areas, temp_dir, selected_layers, feedback, parameters, context)
+            else:
+                result = self.download_geodata(source_areas[0][1], temp_dir, selected_layers, feedback, parameters, context)
 
             # Return processed layer paths
             outputs = {layer_name: sink_path for layer_name, sink_path in result.items()}
+            if self.output_writer is not None:
+                outputs.update(self.finish_output_writer(context))
+                outputs[output_key] = output_path
+
+            # Log the timings of the run and write them to the report
+            self.report.finish()
+            feedback.pushInfo(self.report.summary())
+            report_path = self.parameterAsFileOutput(parameters, 'report', context)
+            if report_path:
+                self.report.write(report_path)
+                outputs['report'] = report_path
             return outputs
         except Exception as e:
+            if self.output_writer is not None:
+                self.output_writer.close()
+
             # Catch any exceptions and provide feedback
             feedback.reportError(f"Error during processing: {str(e)}")
             raise QgsProcessingException(f"Processing error: {str(e)}")
+        finally:
+            # Remove the scratch files on success, error and cancellation alike
+            if not self.workspace.cleanup():
+                feedback.pushInfo(f"Some scratch files in {temp_dir} are still in use; a later run removes them.")
+            self.workspace = None
+
+    def download_batch(self, source_areas, temp_dir, selected_layers, feedback, parameters, context):
+        """
+        Download geodata for many input polygons. Polygons whose buffered
+        areas overlap are merged into shared PDOK requests, which run concurrently, and the results are
+        written to combined outputs with the id of the source feature.
+        """
+        buffer_distance = self.parameterAsDouble(parameters, 'buffer_distance', context)
+        groups = self.merge_source_areas(source_areas, buffer_distance)
+        feedback.pushInfo(f"Batch mode: {len(source_areas)} features merged into {len(groups)} requests.")
+
+        # Outputs are shared by all requests
+        sinks = {}
+        sink_lock = threading.Lock()
+
+        def run_group(group):
+            group_wkt, group_areas = group
+            return self.download_geodata(
+                group_wkt, temp_dir, selected_layers, feedback, parameters, context,
+                source_areas=group_areas, sinks=sinks, sink_lock=sink_lock
+            )
+
+        return self.download_concurrently(run_group, groups)
+
+    def download_concurrently(self, download, items):
+        """
+        Call ``download`` for every item on up to BATCH_MAX_REQUESTS threads
+        and merge the result paths they return. The algorithm thread waits
+        through algorithm_calls, so the requests can create sinks meanwhile.
+        """
+        result_paths = {}
+        with ThreadPoolExecutor(max_workers=self.BATCH_MAX_REQUESTS) as executor:
+            futures = [executor.submit(download, item) for item in items]
+            self.algorithm_calls.wait(futures)
+            for future in futures:
+                result_paths.update(future.result())
+
+        return result_paths
+
+    def merge_source_areas(self, source_areas, buffer_distance):
+        """
+        Group input polygons whose buffered areas overlap, so each group can be
+        downloaded with a single request. Returns a list of
+        (geofilter WKT, [(source id, polygon WKT), ...]) tuples. Areas are
+        buffered like the clip areas, so groups overlap exactly when those do.
+        """
+        buffered = [self.prepare_clip_geometry(wkt, buffer_distance) for _, wkt in source_areas]
+
+        # Index the buffered areas by their bounding boxes
+        index = QgsSpatialIndex()
+        for i, geometry in enumerate(buffered):
+            index.addFeature(i, geometry.boundingBox())
 
-    def download_geodata(self, wkt_polygon, temp_dir, selected_layers, feedback, parameters, context):
+        # Union-find over overlapping buffered areas
+        parents = list(range(len(buffered)))
+
+        def find(i):
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        for i, geometry in enumerate(buffered):
+            for j in index.intersects(geometry.boundingBox()):
+                if j > i and geometry.intersects(buffered[j]):
+                    parents[find(j)] = find(i)
+
+        # Collect the groups in input order
+        members = {}
+        for i in range(len(buffered)):
+            members.setdefault(find(i), []).append(i)
+
+        groups = []
+        for group in members.values():
+            # The union of overlapping buffered areas is a single polygon
+            geofilter = QgsGeometry.unaryUnion([buffered[i] for i in group])
+            groups.append((geofilter.asWkt(), [source_areas[i] for i in group]))
+        return groups
+
+    def download_tiled(self, tile_wkts, wkt_polygon, temp_dir, selected_layers, feedback, parameters, context, source_areas=None, sinks=None, sink_lock=None, seen_ids=None):
+        """
+        Download a large area as separate tile requests running concurrently.
+        Every tile is clipped to the full area, and objects crossing tile
+        borders are written once, based on their lokaalID.
+        """
+        feedback.pushInfo(f"Area split into {len(tile_wkts)} tiles.")
+
+        # Outputs and seen objects are shared by all tiles
+        source_areas = source_areas or [(None, wkt_polygon)]
+        sinks = {} if sinks is None else sinks
+        sink_lock = sink_lock or threading.Lock()
+        seen_ids = {} if seen_ids is None else seen_ids
+
+        def run_tile(tile_wkt):
+            return self.download_geodata(
+                tile_wkt, temp_dir, selected_layers, feedback, parameters, context,
+                source_areas=source_areas, sinks=sinks, sink_lock=sink_lock, seen_ids=seen_ids
+            )
+
+        return self.download_concurrently(run_tile, tile_wkts)
+
+    def download_pipelined(self, layer_groups, wkt_polygon, temp_dir, feedback, parameters, context, source_areas=None, sinks=None, sink_lock=None, seen_ids=None):
+        """
+        Download the layer groups as separate requests running concurrently.
+        Each group is extracted, clipped and written as soon as its archive
+        arrives, while the other groups may still be generated by PDOK.
+        """
+        feedback.pushInfo(f"Layers split over {len(layer_groups)} requests: {'; '.join(', '.join(group) for group in layer_groups)}")
+
+        sinks = {} if sinks is None else sinks
+        sink_lock = sink_lock or threading.Lock()
+
+        def run_group(layer_group):
+            start = time.perf_counter()
+            result_paths = self.download_geodata(
+                wkt_polygon, temp_dir, layer_group, feedback, parameters, context,
+                source_areas=source_areas, sinks=sinks, sink_lock=sink_lock, seen_ids=seen_ids
+            )
+            feedback.pushInfo(f"Layers {', '.join(layer_group)} ready after {time.perf_counter() - start:.1f} s.")
+            return result_paths
+
+        return self.download_concurrently(run_group, layer_groups)
+
+    def split_into_tiles(self, wkt_polygon, tile_area):
+        """
+        Split a polygon into square grid tiles of at most the given area (m²).
+        Returns the WKT of the non-empty tile parts, or the polygon itself if
+        it is small enough.
+        """
+        geometry = QgsGeometry.fromWkt(wkt_polygon)
+        if geometry.area() <= tile_area * (1 + 1e-9):
+            return [wkt_polygon]
+
+        extent = geometry.boundingBox()
+        tile_size = math.sqrt(tile_area)
+        columns = math.ceil(extent.width() / tile_size)
+        rows = math.ceil(extent.height() / tile_size)
+
+        tiles = []
+        for row in range(rows):
+            for column in range(columns):
+                x_min = extent.xMinimum() + column * tile_size
+                y_min = extent.yMinimum() + row * tile_size
+                tile = QgsGeometry.fromRect(QgsRectangle(x_min, y_min, x_min + tile_size, y_min + tile_size))
+                part = geometry.intersection(tile)
+                if QgsWkbTypes.flatType(part.wkbType()) == QgsWkbTypes.GeometryCollection:
+                    part.convertGeometryCollectionToSubclass(QgsWkbTypes.PolygonGeometry)
+                if not part.isEmpty() and part.area() > 0:
+                    tiles.append(part.asWkt())
+        return tiles
+
+    def download_geodata(self, wkt_polygon, temp_dir, selected_layers, feedback, parameters, context, source_areas=None, sinks=None, sink_lock=None, seen_ids=None):
         """
         Download geodata from PDOK API based on the WKT polygon and selected layers.
+        When source areas are given, the data is clipped to each of them instead
+        of to the WKT polygon (see extract_and_load_data). Areas larger than the
+        tile area are downloaded in tiles.
         """
-        base_url = "https://api.pdok.nl/lv/bgt/download/v1_0/full/custom"
-        headers = {'Content-Type': 'application/json'}
+        import requests
+        from .bgt_loader_client import shared_client
+        # Serve the request from a local extract instead of PDOK if one is given
+        offline_path = self.parameterAsFile(parameters, 'offline_store', context)
+        if offline_path:
+            return self.load_offline(offline_path, wkt_polygon, selected_layers, feedback, parameters, context, source_areas, sinks, sink_lock, seen_ids)
+
+        # Split large areas into tiles that are requested separately
+        tile_area = self.parameterAsDouble(parameters, 'tile_area_km2', context) * 1000000
+        tile_wkts = self.split_into_tiles(wkt_polygon, tile_area)
+        if len(tile_wkts) > 1:
+            return self.download_tiled(tile_wkts, wkt_polygon, temp_dir, selected_layers, feedback, parameters, context, source_areas, sinks, sink_lock, seen_ids)
+
+        # Split the layers over concurrent requests if requested
+        layers_per_request = self.parameterAsInt(parameters, 'layers_per_request', context)
+        if 0 < layers_per_request < len(selected_layers):
+            layer_groups = [selected_layers[i:i + layers_per_request] for i in range(0, len(selected_layers), layers_per_request)]
+            return self.download_pipelined(layer_groups, wkt_polygon, temp_dir, feedback, parameters, context, source_areas, sinks, sink_lock, seen_ids)
+
+        base_url = shared_client().url(self.FULL_PATH)
 
         # Define API request payload
         payload = {"format": "gmllight", "geofilter": wkt_polygon, "featuretypes": selected_layers}
         feedback.pushInfo(f"Payload: {payload}")
 
+        buffer_distance = self.parameterAsDouble(parameters, 'buffer_distance', context)
+
+        # Serve the request from the local cache when possible
+        requested_geometry = QgsGeometry.fromWkt(wkt_polygon)
+        normalised_wkt = self.normalise_geofilter(requested_geometry)
+        cache = None
+        cache_key = None
+        if self.parameterAsBool(parameters, 'use_cache', context) and not self.fresh_downloads:
+            cache = self.create_cache(parameters, context)
+            cache_key = cache.make_key(base_url, normalised_wkt, selected_layers, payload["format"])
+
+            # The archive is read in place, pinned so it is not evicted meanwhile
+            cached_path = cache.get(cache_key) or cache.find_superset(
+                base_url, selected_layers, payload["format"],
+                lambda cached_wkt: QgsGeometry.fromWkt(cached_wkt).contains(requested_geometry)
+            )
+            if cached_path:
+                feedback.pushInfo(f"Using cached download: {cached_path}")
+                try:
+                    return self.extract_and_load_data(cached_path, temp_dir, wkt_polygon, feedback, buffer_distance, parameters, context, source_areas, sinks, sink_lock, seen_ids, selected_layers)
+                finally:
+                    cache.release(cached_path)
+
         result_paths = {}
+        status_timeout = self.parameterAsDouble(parameters, 'status_timeout_minutes', context) * 60
 
         try:
-            # Send request to PDOK API
-            response = requests.post(base_url, headers=headers, json=payload)
-            if response.status_code == 202:
-                download_request_id = response.json().get("downloadRequestId")
-                
-                # Check the status of the download request
-                if not self.check_status(download_request_id, base_url, feedback):
-                    # Proceed with downloading the data if available
-                    result_paths = self.download_data(download_request_id, base_url, temp_dir, wkt_polygon, feedback, parameters, context)
+            if self.fresh_downloads:
+                output_path = self.request_archive(payload, base_url, temp_dir, feedback, status_timeout)
             else:
-                feedback.pushInfo(f"Error retrieving data: {response.status_code}\n{response.text}")
+                # Identical requests running at the same time share one PDOK job and archive
+                request_key = RequestCoordinator.make_key(base_url, normalised_wkt, selected_layers, payload["format"])
+                output_path = shared_coordinator().fetch(
+                    request_key, temp_dir,
+                    lambda directory: self.request_archive(payload, base_url, directory, feedback, status_timeout),
+                    feedback
+                )
+            if not output_path and self.fresh_downloads:
+                raise QgsProcessingException("The full download for the local store failed.")
+            if output_path:
+                if cache is not None:
+                    # Followers of a shared request keep the archive cached by its leader
+                    cache.put(cache_key, output_path, base_url, normalised_wkt, selected_layers, payload["format"])
+
+                # Extract and load the downloaded data
+                result_paths = self.extract_and_load_data(output_path, temp_dir, wkt_polygon, feedback, buffer_distance, parameters, context, source_areas, sinks, sink_lock, seen_ids, selected_layers)
         except requests.RequestException as e:
+            if self.fresh_downloads:
+                raise QgsProcessingException(f"The full download for the local store failed: {str(e)}")
             feedback.pushInfo(f"An error occurred while retrieving data: {str(e)}")
 
         return result_paths
 
-    def check_status(self, download_request_id, base_url, feedback):
+    def load_offline(self, offline_path, wkt_polygon, selected_layers, feedback, parameters, context, source_areas=None, sinks=None, sink_lock=None, seen_ids=None):
+        """
+        Clip the selected layers from a local BGT extract built with
+        import_extract. The spatial indexes of the extract limit reading to
+        the features around the area, so no network is needed.
+        """
+        extract = BgtLocalStore(offline_path)
+        feedback.pushInfo(f"Using local extract {offline_path}.")
+        layer_files = [(layer_name, extract.layer_uri(layer_name)) for layer_name in selected_layers]
+        buffer_distance = self.parameterAsDouble(parameters, 'buffer_distance', context)
+        return self.process_layer_files(layer_files, wkt_polygon, feedback, buffer_distance, parameters, context, source_areas, sinks, sink_lock, seen_ids)
+
+    def import_extract(self, zip_paths, extract_path, feedback):
+        """
+        Import BGT archives (e.g. a national or provincial PDOK download) into
+        a GeoPackage for use with the offline_store parameter. Features are
+        copied unclipped with their original geometries; the R-tree and
+        lokaalID indexes are built after loading. Returns the imported layers.
+        """
+        from .bgt_loader_geopackage import GeoPackageWriter
+        # Neighbouring archives overlap at their borders, so objects are
+        # imported once: the extract itself keeps their lokaalIDs unique
+        unique_field = self.LOKAAL_ID_FIELD if len(zip_paths) > 1 else None
+        writer = GeoPackageWriter(extract_path, index_fields=[self.LOKAAL_ID_FIELD], unique_field=unique_field)
+        sinks = {}
+        try:
+            for zip_path in zip_paths:
+                for layer_name, file_path in self.archive_layer_files(zip_path, feedback):
+                    if feedback.isCanceled():
+                        return writer.layer_names()
+                    layer = self.load_layer(layer_name, file_path, self.IMPORT_STREAMING_THRESHOLD, feedback)
+                    if layer is None:
+                        continue
+
+                    # Curves are kept, so lines and polygons are stored as multi curves and surfaces
+                    if layer_name not in sinks:
+                        wkb_type = {
+                            QgsWkbTypes.LineGeometry: QgsWkbTypes.MultiCurve,
+                            QgsWkbTypes.PolygonGeometry: QgsWkbTypes.MultiSurface,
+                        }.get(layer.geometryType(), layer.wkbType())
+                        sinks[layer_name] = writer.create_layer(layer_name, layer.fields(), wkb_type, layer.crs())
+                    field_map = self.field_map(layer.fields(), writer.layer_fields(layer_name))
+
+                    stored_count = writer.feature_count(layer_name)
+                    batch = []
+                    for feature in layer.getFeatures():
+                        if field_map is not None:
+                            feature.setAttributes([feature.attributes()[i] if i >= 0 else None for i in field_map])
+                        batch.append(feature)
+                        if len(batch) >= self.SINK_BATCH_SIZE:
+                            sinks[layer_name].addFeatures(batch)
+                            batch = []
+                    if batch:
+                        sinks[layer_name].addFeatures(batch)
+                    count = writer.feature_count(layer_name) - stored_count
+                    feedback.pushInfo(f"Imported {count} features of layer {layer_name}.")
+        finally:
+            feedback.pushInfo("Building spatial indexes...")
+            writer.close()
+        return writer.layer_names()
+
+    def request_archive(self, payload, base_url, temp_dir, feedback, status_timeout):
+        """
+        Submit a download request to PDOK, wait until it is ready and download
+        the archive into ``temp_dir``. Returns its path, or None on failure.
+
+        Batch, tiled and pipelined mode run downloads from nested worker
+        pools, so at most BATCH_MAX_REQUESTS requests of a run are in flight
+        at once, whichever pool they come from.
         """
-        Check the status of the download request until it's ready.
+        from .bgt_loader_client import shared_client
+        client = shared_client()
+        headers = {'Content-Type': 'application/json'}
+
+        with self.request_slots:
+            # Send request to PDOK API
+            with self.report.stage('submit'):
+                response = client.post(base_url, headers=headers, json=payload)
+            if response.status_code != 202:
+                feedback.pushInfo(f"Error retrieving data: {response.status_code}\n{response.text}")
+                return None
+            download_request_id = response.json().get("downloadRequestId")
+
+            # Check the status of the download request
+            with self.report.stage('queue_wait'):
+                status_failed = self.check_status(download_request_id, base_url, feedback, status_timeout)
+            if status_failed:
+                return None
+
+            # Proceed with downloading the data if available
+            return self.download_data(download_request_id, base_url, temp_dir, feedback)
+
+    def create_cache(self, parameters, context):
         """
+        Open the persistent download cache in the QGIS settings directory.
+        """
+        cache_dir = os.path.join(QgsApplication.qgisSettingsDirPath(), 'cache', 'bgt_loader')
+        ttl_hours = self.parameterAsDouble(parameters, 'cache_ttl_hours', context)
+        max_size_mb = self.parameterAsInt(parameters, 'cache_max_size_mb', context)
+        return BgtDownloadCache(cache_dir, ttl_hours * 3600, max_size_mb * 1024 * 1024)
+
+    def normalise_geofilter(self, geometry):
+        """
+        Normalise a geofilter geometry to millimetre precision, so equal areas
+        produce equal cache keys.
+        """
+        normalised = geometry.snappedToGrid(0.001, 0.001)
+        normalised.normalize()
+        return normalised.asWkt(3)
+
+    def check_status(self, download_request_id, base_url, feedback, timeout):
+        """
+        Check the status of the download request until it's ready. Polling
+        starts fast and backs off exponentially, and stops on cancellation or
+        after ``timeout`` seconds. Status checks run on a worker thread that
+        is abandoned when the run is canceled, so a cancellation is noticed
+        within a second even while a check is blocked on the network.
+        Returns True if the data is not available.
+        """
+        from .bgt_loader_client import shared_client
         status_url = f"{base_url}/{download_request_id}/status"
         headers = {'Content-Type': 'application/json'}
 
-        while True:
-            # Check the status of the request
-            response = requests.get(status_url, headers=headers)
-            if response.status_code == 201:
-                return False  # Data is ready
-            elif response.status_code == 200:
-                time.sleep(5)  # Wait for the process to complete
-            else:
-                feedback.pushInfo(f"Error checking status: {response.status_code}\n{response.text}")
-                return True
+        deadline = time.monotonic() + timeout
+        interval = self.STATUS_POLL_MIN_INTERVAL
+        poller = ThreadPoolExecutor(max_workers=1)
+        try:
+            while True:
+                if feedback.isCanceled():
+                    feedback.pushInfo("Download request canceled.")
+                    return True
 
-    def download_data(self, download_request_id, base_url, temp_dir, wkt_polygon, feedback, parameters, context):
+                # Check the status of the request, waiting in short steps so a canceled check is abandoned
+                check = poller.submit(shared_client().get, status_url, headers=headers, timeout=self.STATUS_REQUEST_TIMEOUT, is_canceled=feedback.isCanceled)
+                response = None
+                while response is None and not feedback.isCanceled():
+                    try:
+                        response = check.result(timeout=self.CANCEL_CHECK_INTERVAL)
+                    except FutureTimeoutError:
+                        pass
+                if feedback.isCanceled():
+                    feedback.pushInfo("Download request canceled.")
+                    return True
+                if response.status_code == 201:
+                    self.report_status_progress(download_request_id, 100.0, feedback)
+                    return False  # Data is ready
+                elif response.status_code != 200:
+                    feedback.pushInfo(f"Error checking status: {response.status_code}\n{response.text}")
+                    return True
+
+                # Report the progress PDOK made generating the download
+                try:
+                    progress = response.json().get("progress")
+                except ValueError:
+                    progress = None
+                if progress is not None:
+                    self.report_status_progress(download_request_id, float(progress), feedback)
+
+                if time.monotonic() >= deadline:
+                    feedback.pushInfo(f"PDOK did not finish the download within {timeout / 60:.0f} minutes.")
+                    return True
+
+                # Wait in short steps so a cancellation is noticed within a second
+                wake_up = min(time.monotonic() + interval, deadline)
+                while not feedback.isCanceled() and time.monotonic() < wake_up:
+                    time.sleep(min(self.CANCEL_CHECK_INTERVAL, wake_up - time.monotonic()))
+                interval = min(interval * 2, self.STATUS_POLL_MAX_INTERVAL)
+        finally:
+            poller.shutdown(wait=False)  # An abandoned check finishes on its own within its timeout
+
+    def report_status_progress(self, download_request_id, progress, feedback):
+        """
+        Report the progress PDOK made generating a download. Tiled, batch
+        and pipelined runs poll several requests at once, so the run reports
+        the mean progress of all its requests instead of the latest one.
+        """
+        with self.status_progress_lock:
+            self.status_progress[download_request_id] = progress
+            feedback.setProgress(sum(self.status_progress.values()) / len(self.status_progress))
+
+    def download_data(self, download_request_id, base_url, temp_dir, feedback):
         """
         Download the requested BGT data after successful status check.
+        Returns the path of the downloaded zip file, or None on failure.
         """
+        from .bgt_loader_client import shared_client
         status_url = f"{base_url}/{download_request_id}/status"
         headers = {'Content-Type': 'application/json'}
 
         # Get download link from the status response
-        response = requests.get(status_url, headers=headers)
+        client = shared_client()
+        response = client.get(status_url, headers=headers)
         if response.status_code == 201:
             download_href = response.json()["_links"]["download"]["href"]
-            full_download_url = f"https://api.pdok.nl{download_href}"
-
-            # Download the actual data file (zip)
-            data_response = requests.get(full_download_url)
-            if data_response.status_code == 200:
-                output_path = os.path.join(temp_dir, f"geodata_{download_request_id}.zip")
-                with open(output_path, 'wb') as f:
-                    f.write(data_response.content)
-                feedback.pushInfo(f"Data saved to {output_path}")
+            full_download_url = client.url(download_href)
 
-                # Extract and load the downloaded data
-                buffer_distance = self.parameterAsDouble(parameters, 'buffer_distance', context)
-                result_paths = self.extract_and_load_data(output_path, temp_dir, wkt_polygon, feedback, buffer_distance, parameters, context)
-                return result_paths
+            # Stream the actual data file (zip) to disk
+            output_path = os.path.join(temp_dir, f"geodata_{download_request_id}.zip")
+            start = time.perf_counter()
+            downloaded = self.stream_download(full_download_url, output_path, feedback)
+            self.report.add_download(os.path.getsize(output_path) if os.path.exists(output_path) else 0, time.perf_counter() - start)
+            if downloaded:
+                feedback.pushInfo(f"Data saved to {output_path}")
+                return output_path
             else:
                 feedback.pushInfo("Error downloading data.")
         else:
             feedback.pushInfo("Error obtaining download URL.")
 
-        return {}
+        return None
+
+    def scratch_reservation(self, byte_count, description):
+        """
+        Reserve room in the scratch workspace of the run while a file is
+        written, see ScratchWorkspace.reservation. Yields None if the run
+        has no workspace.
+        """
+        if self.workspace is None:
+            return nullcontext()
+        return self.workspace.reservation(byte_count, description)
+
+    def stream_download(self, url, output_path, feedback):
+        """
+        Stream a file to disk in fixed-size chunks, resuming with HTTP Range
+        requests when the connection drops. Returns True if the complete file
+        was written.
+        """
+        import requests
+        from .bgt_loader_client import shared_client
+        expected_size = None
+        retries = 0
+
+        while True:
+            # Resume from whatever is already on disk
+            written = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+            headers = {'Range': f"bytes={written}-"} if written else {}
+
+            try:
+                with shared_client().get(url, headers=headers, stream=True, timeout=self.DOWNLOAD_TIMEOUT) as response:
+                    if response.status_code == 416 and written and expected_size in (None, written):
+                        return True  # Nothing left to fetch
+                    if response.status_code == 200:
+                        # Server ignored the range (or first request): start over
+                        written = 0
+                        mode = 'wb'
+                        content_length = response.headers.get('Content-Length')
+                        expected_size = int(content_length) if content_length else None
+                    elif response.status_code == 206:
+                        mode = 'ab'
+                        content_range = response.headers.get('Content-Range', '')
+                        if '/' in content_range and not content_range.endswith('/*'):
+                            expected_size = int(content_range.rsplit('/', 1)[-1])
+                    else:
+                        feedback.pushInfo(f"Error downloading data: {response.status_code}")
+                        return False
 
-    def extract_and_load_data(self, zip_path, temp_dir, wkt_polygon, feedback, buffer_distance, parameters, context):
+                    # Fail before writing if the rest of the file does not fit, or,
+                    # without a known size, as soon as the next chunk does not fit
+                    remaining = expected_size - written if expected_size else 0
+                    with self.scratch_reservation(remaining, f"Download {os.path.basename(output_path)}") as reservation, open(output_path, mode) as f:
+                        for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                            if feedback.isCanceled():
+                                return False
+                            if not chunk:
+                                continue
+                            if reservation is not None:
+                                reservation.claim(len(chunk))
+                            f.write(chunk)
+                            written += len(chunk)
+                            if expected_size:
+                                feedback.setProgress(100.0 * written / expected_size)
+            except requests.RequestException as e:
+                retries += 1
+                if retries > self.DOWNLOAD_MAX_RETRIES:
+                    feedback.pushInfo(f"Download failed after {self.DOWNLOAD_MAX_RETRIES} retries: {str(e)}")
+                    return False
+                feedback.pushInfo(f"Download interrupted at {written} bytes, resuming ({retries}/{self.DOWNLOAD_MAX_RETRIES})...")
+                continue
+
+            # Verify the size of the downloaded file
+            if expected_size is None or written == expected_size:
+                feedback.pushInfo(f"Downloaded {written} bytes.")
+                return True
+
+            retries += 1
+            if retries > self.DOWNLOAD_MAX_RETRIES:
+                feedback.pushInfo(f"Incomplete download: {written} of {expected_size} bytes.")
+                return False
+            feedback.pushInfo(f"Incomplete download ({written} of {expected_size} bytes), resuming...")
+
+    def update_local_store(self, store_path, wkt_polygon, temp_dir, selected_layers, feedback, parameters, context):
         """
-        Extract the zip file and process the GML files.
+        Bring the local store for this area up to date and copy it to the
+        outputs. A store that matches the request is updated with the delta
+        downloads published since its last update; otherwise it is rebuilt
+        from a full download.
         """
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)  # Extract all files to temp directory
-            extracted_files = zip_ref.namelist()  # List of extracted file names
+        from .bgt_loader_geopackage import GeoPackageWriter
+        store = BgtLocalStore(store_path)
+        buffer_distance = self.parameterAsDouble(parameters, 'buffer_distance', context)
+        geofilter = self.normalise_geofilter(QgsGeometry.fromWkt(wkt_polygon))
 
+        # Deltas in chronological order
+        delta_ids = self.fetch_delta_ids(feedback)
+
+        pending_deltas = None
+        if store.matches(geofilter, selected_layers, buffer_distance, self.read_filter, self.output_profile):
+            last_delta_id = store.read_metadata()['delta_id']
+            if last_delta_id in delta_ids:
+                pending_deltas = delta_ids[delta_ids.index(last_delta_id) + 1:]
+            else:
+                feedback.pushInfo(f"Delta {last_delta_id} is no longer available, rebuilding the local store.")
+
+        if pending_deltas is None:
+            # Record the latest delta before requesting the full download, so no mutation is missed
+            latest_delta_id = delta_ids[-1] if delta_ids else None
+            feedback.pushInfo(f"Building local store {store_path} from a full download.")
+            store.remove()
+
+            # Write the layers into the store instead of the outputs. A cached
+            # or shared archive can be older than latest_delta_id, so the
+            # full download is always requested anew, and a failed one raises.
+            output_writer = self.output_writer
+            self.output_writer = GeoPackageWriter(store.path, index_fields=[self.LOKAAL_ID_FIELD])
+            self.fresh_downloads = True
+            complete = False
+            try:
+                self.download_geodata(wkt_polygon, temp_dir, selected_layers, feedback, parameters, context)
+                if feedback.isCanceled():
+                    raise QgsProcessingException("Canceled while building the local store.")
+
+                # Layers without objects in the area get an empty store layer,
+                # so later deltas can add to them. Their fields and geometry
+                # type are taken from the first delta, see apply_delta_layer.
+                empty_fields = QgsFields()
+                empty_fields.append(QgsField(self.LOKAAL_ID_FIELD, QVariant.String))
+                for layer_name in selected_layers:
+                    if layer_name not in self.output_writer.layer_names():
+                        self.output_writer.create_layer(layer_name, empty_fields, QgsWkbTypes.Unknown, QgsCoordinateReferenceSystem("EPSG:28992"))
+                complete = True
+            finally:
+                self.fresh_downloads = False
+                self.output_writer.close()
+                self.output_writer = output_writer
+                if not complete:
+                    # Never leave a partial store behind that a later run would update
+                    store.remove()
+            store.write_metadata(geofilter, selected_layers, buffer_distance, latest_delta_id, self.read_filter, self.output_profile)
+        else:
+            feedback.pushInfo(f"Applying {len(pending_deltas)} deltas to local store {store_path}.")
+            status_timeout = self.parameterAsDouble(parameters, 'status_timeout_minutes', context) * 60
+            for delta_id in pending_deltas:
+                if feedback.isCanceled():
+                    break
+                applied = self.apply_delta(store, delta_id, wkt_polygon, temp_dir, selected_layers, buffer_distance, status_timeout, feedback)
+                if not applied or feedback.isCanceled():
+                    # Layers already committed are fine: applying a delta again is idempotent
+                    break
+                store.write_metadata(geofilter, selected_layers, buffer_distance, delta_id, self.read_filter, self.output_profile)
+
+        return self.copy_store_to_outputs(store, selected_layers, feedback, parameters, context)
+
+    def fetch_delta_ids(self, feedback):
+        """
+        List the ids of all deltas PDOK currently offers, oldest first.
+        """
+        from .bgt_loader_client import shared_client
+        headers = {'Content-Type': 'application/json'}
+        deltas = []
+        client = shared_client()
+        url = client.url(self.DELTA_PATH)
+
+        # Follow the paging links until the last page
+        while url:
+            response = client.get(url, headers=headers)
+            if response.status_code != 200:
+                raise QgsProcessingException(f"Error retrieving deltas: {response.status_code}\n{response.text}")
+            body = response.json()
+            deltas.extend(body.get("deltas", []))
+
+            next_link = next((link for link in body.get("_links", []) if link.get("rel") == "next"), None)
+            url = client.url(next_link['href']) if next_link else None
+
+        deltas.sort(key=lambda delta: delta.get("timeWindow", {}).get("to", ""))
+        return [delta["id"] for delta in deltas]
+
+    def apply_delta(self, store, delta_id, wkt_polygon, temp_dir, selected_layers, buffer_distance, status_timeout, feedback):
+        """
+        Download the mutations of a single delta for the area and apply them
+        to the local store, one transaction per layer. Returns False if it was
+        canceled before all layers were applied.
+        """
+        from .bgt_loader_client import shared_client
+        client = shared_client()
+        base_url = client.url(f"{self.DELTA_PATH}/custom")
+        headers = {'Content-Type': 'application/json'}
+        payload = {"deltaId": delta_id, "format": "gmllight", "geofilter": wkt_polygon, "featuretypes": selected_layers}
+
+        response = client.post(base_url, headers=headers, json=payload)
+        if response.status_code != 202:
+            raise QgsProcessingException(f"Error requesting delta {delta_id}: {response.status_code}\n{response.text}")
+        download_request_id = response.json().get("downloadRequestId")
+        if self.check_status(download_request_id, base_url, feedback, status_timeout):
+            if feedback.isCanceled():
+                return False
+            raise QgsProcessingException(f"Delta {delta_id} could not be generated.")
+
+        delta_dir = os.path.join(temp_dir, f"delta_{delta_id}")
+        os.makedirs(delta_dir, exist_ok=True)
+        zip_path = self.download_data(download_request_id, base_url, delta_dir, feedback)
+        if not zip_path:
+            if feedback.isCanceled():
+                return False
+            raise QgsProcessingException(f"Delta {delta_id} could not be downloaded.")
+
+        clip_geometry = self.prepare_clip_geometry(wkt_polygon, buffer_distance)
+        for layer_name, file_path in self.archive_layer_files(zip_path, feedback):
+            if layer_name not in selected_layers:
+                continue
+            if feedback.isCanceled() or not self.apply_delta_layer(store, layer_name, file_path, clip_geometry, feedback):
+                return False
+        return True
+
+    def apply_delta_layer(self, store, layer_name, file_path, clip_geometry, feedback):
+        """
+        Replace every object of the delta file in the store layer: stored
+        versions are removed, and versions without an end registration are
+        clipped and inserted. Both happen in one transaction, which is rolled
+        back on an error or cancellation. Returns True if it was committed.
+        """
+        from osgeo import ogr # type: ignore
+        from .bgt_loader_geopackage import OgrSink, add_ogr_fields
+        delta_layer = QgsVectorLayer(file_path, layer_name, "ogr")
+        datasource = ogr.Open(store.path, 1)
+        if datasource is None:
+            raise QgsProcessingException(f"Could not open local store {store.path}.")
+        store_layer = datasource.GetLayerByName(layer_name)
+        if not delta_layer.isValid() or store_layer is None:
+            feedback.pushInfo(f"Skipping delta for layer {layer_name}.")
+            return True
+        delta_layer.setCrs(QgsCoordinateReferenceSystem("EPSG:28992"))
+
+        # Store layers created empty only have the lokaalID: add the fields of the delta
+        definition = store_layer.GetLayerDefn()
+        missing_fields = [field for field in self.output_fields(delta_layer) if definition.GetFieldIndex(field.name()) < 0]
+        if missing_fields:
+            add_ogr_fields(store_layer, missing_fields)
+            definition = store_layer.GetLayerDefn()
+        field_map = [delta_layer.fields().lookupField(definition.GetFieldDefn(i).GetName()) for i in range(definition.GetFieldCount())]
+
+        # Collect the objects touched by this delta
+        id_request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setSubsetOfAttributes([self.LOKAAL_ID_FIELD], delta_layer.fields())
+        changed_ids = [feature[self.LOKAAL_ID_FIELD] for feature in delta_layer.getFeatures(id_request)]
+
+        datasource.StartTransaction()
+        try:
+            # Remove the stored versions of those objects in chunks
+            removed = 0
+            for start in range(0, len(changed_ids), 500):
+                values = ", ".join(QgsExpression.quotedValue(value) for value in changed_ids[start:start + 500])
+                store_layer.SetAttributeFilter(f'"{self.LOKAAL_ID_FIELD}" IN ({values})')
+                stale_ids = [stored_feature.GetFID() for stored_feature in store_layer]
+                store_layer.SetAttributeFilter(None)
+                for fid in stale_ids:
+                    store_layer.DeleteFeature(fid)
+                removed += len(stale_ids)
+
+            # Insert the versions that are still current and pass the read filter
+            read_filter = dict(self.read_filter or {'values': {}, 'fields': []}, current_only=True)
+            expression = self.filter_expression(read_filter, delta_layer.fields())
+            if expression:
+                delta_layer.setSubsetString(expression)
+            added = self.clip_layer_to_polygon(
+                delta_layer, clip_geometry, self.create_clip_engine(clip_geometry), OgrSink(store_layer), feedback,
+                field_map=field_map
+            )
+        except Exception:
+            datasource.RollbackTransaction()
+            raise
+        if feedback.isCanceled():
+            # Removed objects without their new versions would be lost
+            datasource.RollbackTransaction()
+            feedback.pushInfo(f"Layer {layer_name}: delta not applied, canceled.")
+            return False
+        datasource.CommitTransaction()
+        feedback.pushInfo(f"Layer {layer_name}: {removed} objects removed, {added} inserted.")
+        return True
+
+    def copy_store_to_outputs(self, store, selected_layers, feedback, parameters, context):
+        """
+        Copy the layers of the local store to the outputs of the algorithm.
+        """
         result_paths = {}
+        for layer_name in selected_layers:
+            store_layer = QgsVectorLayer(store.layer_uri(layer_name), layer_name, "ogr")
+            if not store_layer.isValid():
+                feedback.pushInfo(f"Layer {layer_name} not present in local store.")
+                continue
+
+            wkb_type = store_layer.wkbType()
+            if wkb_type == QgsWkbTypes.Unknown:
+                # Layers created empty take the type of their first object
+                first_feature = next(store_layer.getFeatures(QgsFeatureRequest().setLimit(1)), None)
+                if first_feature is None:
+                    feedback.pushInfo(f"Layer {layer_name} has no objects in local store.")
+                    continue
+                wkb_type = QgsWkbTypes.multiType(first_feature.geometry().wkbType())
 
-        # Process each extracted file
-        for file_name in extracted_files:
-            file_path = os.path.join(temp_dir, file_name)
+            fields = self.output_fields(store_layer)
+            field_map = self.field_map(store_layer.fields(), fields)
+            sink, sink_path = self.create_sink(layer_name, fields, wkb_type, store_layer.crs(), parameters, context)
+            batch = []
+            for feature in store_layer.getFeatures():
+                if field_map is not None:
+                    feature.setAttributes([feature.attributes()[i] if i >= 0 else None for i in field_map])
+                batch.append(feature)
+                if len(batch) >= self.SINK_BATCH_SIZE:
+                    sink.addFeatures(batch, QgsFeatureSink.FastInsert)
+                    batch = []
+            if batch:
+                sink.addFeatures(batch, QgsFeatureSink.FastInsert)
 
+            result_paths[layer_name] = sink_path
+        return result_paths
+
+    def archive_layer_files(self, zip_path, feedback):
+        """
+        List the BGT layers in a downloaded archive as (layer name, path)
+        pairs, in archive order. The paths point into the archive through
+        GDAL's /vsizip/ file system, so nothing is extracted to disk.
+        """
+        with self.report.stage('extract'), zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            file_names = zip_ref.namelist()  # Only reads the central directory
+
+        layer_files = []
+        for file_name in file_names:
             # Only process GML files that start with 'bgt_'
             if not file_name.lower().endswith(".gml") or not file_name.startswith("bgt_"):
                 feedback.pushInfo(f"Skipping unsupported or unrecognized file: {file_name}")
@@ -231,80 +1071,630 @@ class BgtLoaderAlgorithm(QgsProcessingAlgorithm):
             layer_name = file_name.split("bgt_")[-1].split(".gml")[0]
 
             # Skip unrecognized layers
-            if layer_name not in self.layers:
+            if layer_name not in layer_names():
                 feedback.pushInfo(f"Layer {layer_name} not recognized in selected layers.")
                 continue
 
-            # Load the layer using QGIS
-            layer = QgsVectorLayer(file_path, layer_name, "ogr")
-            if not layer.isValid():
-                feedback.pushInfo(f"Failed to load layer: {file_name}")
-                continue
+            layer_files.append((layer_name, f"/vsizip/{zip_path}/{file_name}"))
+        return layer_files
 
-            # Set CRS to EPSG:28992 (Dutch RD New coordinate system)
-            layer.setCrs(QgsCoordinateReferenceSystem("EPSG:28992"))
+    def extract_and_load_data(self, zip_path, temp_dir, wkt_polygon, feedback, buffer_distance, parameters, context, source_areas=None, sinks=None, sink_lock=None, seen_ids=None, selected_layers=None):
+        """
+        Process the GML files in the zip file, read in place from the archive.
 
-            # Clip the layer to the input polygon and process it
-            clipped_layer = self.clip_layer_to_polygon(layer, wkt_polygon, file_name, feedback, buffer_distance)
+        By default every layer is clipped to the buffered WKT polygon. When
+        ``source_areas`` ((source id, polygon WKT) pairs) is given, every layer
+        is clipped to each of those areas and the source id is written to an
+        extra attribute. ``sinks`` and ``sink_lock`` allow several calls to
+        write to the same outputs, and ``seen_ids`` (layer name to set of
+        written lokaalIDs) skips objects already written by another call.
+        ``selected_layers`` limits the layers to those of the request.
+        """
+        # Collect the recognised layer files that have an output; a cached
+        # superset download can contain more layers than were selected
+        layer_files = [
+            (layer_name, file_path) for layer_name, file_path in self.archive_layer_files(zip_path, feedback)
+            if parameters.get(layer_name) is not None and (selected_layers is None or layer_name in selected_layers)
+        ]
+        return self.process_layer_files(layer_files, wkt_polygon, feedback, buffer_distance, parameters, context, source_areas, sinks, sink_lock, seen_ids)
 
-            # Prepare to save the clipped layer to the defined sinks
-            sink, sink_path = self.parameterAsSink(parameters, layer_name, context, clipped_layer.fields(), clipped_layer.wkbType(), clipped_layer.sourceCrs())
+    def process_layer_files(self, layer_files, wkt_polygon, feedback, buffer_distance, parameters, context, source_areas=None, sinks=None, sink_lock=None, seen_ids=None):
+        """
+        Clip the (layer name, path) pairs of ``layer_files`` in parallel and
+        write them to the outputs, see extract_and_load_data. Returns the
+        output path per layer.
+        """
+        # Build the buffered areas of interest once for all layers
+        if source_areas is None:
+            clip_areas = [(None, self.prepare_clip_geometry(wkt_polygon, buffer_distance))]
+        else:
+            clip_areas = [(source_id, self.prepare_clip_geometry(area_wkt, buffer_distance)) for source_id, area_wkt in source_areas]
+
+        # Sink creation and writes go through one lock, as sinks may share a file
+        sinks = {} if sinks is None else sinks
+        sink_lock = sink_lock or threading.Lock()
 
-            # Add each feature to the sink
-            for feature in clipped_layer.getFeatures():
-                sink.addFeature(feature, QgsFeatureSink.FastInsert)
+        # Aggregate progress over all layers
+        layer_progress = {layer_name: 0.0 for layer_name, _ in layer_files}
+        progress_lock = threading.Lock()
 
-            feedback.pushInfo(f"Layer {layer_name} processed and saved.")
-            result_paths[layer_name] = sink_path  # Save output path for the layer
+        def report_progress(layer_name, fraction):
+            with progress_lock:
+                layer_progress[layer_name] = fraction
+                feedback.setProgress(100.0 * sum(layer_progress.values()) / len(layer_progress))
+
+        # Process the layers in parallel, each worker owning one layer and its sink
+        max_workers = self.parameterAsInt(parameters, 'max_workers', context) or 1
+        feedback.pushInfo(f"Processing {len(layer_files)} layers with {max_workers} workers.")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.process_layer, layer_name, file_path, clip_areas, sinks, sink_lock, report_progress, feedback, parameters, context, seen_ids)
+                for layer_name, file_path in layer_files
+            ]
+
+            # Collect results in archive order so the output is deterministic
+            self.algorithm_calls.wait(futures)
+            result_paths = {}
+            for (layer_name, _), future in zip(layer_files, futures):
+                sink_path = future.result()
+                if sink_path is not None:
+                    result_paths[layer_name] = sink_path  # Save output path for the layer
 
         return result_paths
 
-    def clip_layer_to_polygon(self, layer, polygon_wkt, original_name, feedback, buffer_distance):
+    def process_layer(self, layer_name, file_path, clip_areas, sinks, sink_lock, report_progress, feedback, parameters, context, seen_ids=None):
+        """
+        Load, clip and write a single BGT layer. Returns the sink path, or None
+        if the layer could not be loaded.
+        """
+        from . import bgt_loader_vector
+        if feedback.isCanceled():
+            return None
+
+        # Load the layer using QGIS, or stream very large files
+        streaming_threshold = self.parameterAsInt(parameters, 'streaming_threshold_mb', context) * 1024 * 1024
+        start = time.perf_counter()
+        layer = self.load_layer(layer_name, file_path, streaming_threshold, feedback)
+        self.report.add_layer(layer_name, load_s=time.perf_counter() - start)
+        if layer is None:
+            return None
+
+        # Prepare the sink for this layer, or reuse the one of an earlier request.
+        # Sinks add layers to the context, so they are created on the algorithm thread.
+        with_source_id = clip_areas[0][0] is not None
+        with sink_lock:
+            if layer_name not in sinks:
+                fields = self.output_fields(layer)
+                if with_source_id:
+                    fields.append(QgsField(self.SOURCE_ID_FIELD, QVariant.LongLong))
+                sink, sink_path = self.algorithm_calls.call(self.create_sink, layer_name, fields, self.output_wkb_type(layer), layer.crs(), parameters, context)
+                sinks[layer_name] = (sink, sink_path, fields)
+            sink, sink_path, fields = sinks[layer_name]
+            layer_seen_ids = seen_ids.setdefault(layer_name, set()) if seen_ids is not None else None
+        if sink is None:
+            raise QgsProcessingException(f"Could not create output for layer: {layer_name}")
+
+        # Files from other requests may have a different field order than the sink
+        output_fields = QgsFields(fields)
+        if with_source_id:
+            output_fields.remove(output_fields.lookupField(self.SOURCE_ID_FIELD))
+        field_map = self.field_map(layer.fields(), output_fields)
+
+        # Use the vectorised clip if requested and available
+        vectorised = self.parameterAsBool(parameters, 'vectorised_clip', context)
+        if vectorised and not bgt_loader_vector.available():
+            feedback.pushWarning("Vectorised clipping needs shapely 2; clipping feature by feature instead.")
+            vectorised = False
+
+        # Clip the layer to all areas in one pass, straight into the sink
+        areas = [([source_id] if with_source_id else None, clip_geometry) for source_id, clip_geometry in clip_areas]
+        clip_options = dict(
+            sink_lock=sink_lock,
+            progress_callback=lambda fraction: report_progress(layer_name, fraction),
+            seen_ids=layer_seen_ids,
+            field_map=field_map
+        )
+        if vectorised:
+            feature_count = self.clip_layer_vectorised_to_areas(layer, areas, sink, feedback, **clip_options)
+        else:
+            feature_count = self.clip_layer_to_areas(layer, areas, sink, feedback, **clip_options)
+        report_progress(layer_name, 1.0)
+        self.report.mark('first_layer')
+
+        feedback.pushInfo(f"Layer {layer_name} processed and saved ({feature_count} features).")
+        return sink_path
+
+    def create_sink(self, layer_name, fields, wkb_type, crs, parameters, context):
+        """
+        Create the output for a layer: a layer in the GeoPackage of the output
+        writer if there is one, otherwise the sink of the layer's parameter.
+        Returns a (sink, destination) tuple.
+        """
+        if self.output_writer is not None:
+            return self.output_writer.create_layer(layer_name, fields, wkb_type, crs), self.output_writer.layer_uri(layer_name)
+        return self.parameterAsSink(parameters, layer_name, context, fields, wkb_type, crs)
+
+    def create_output_writer(self, parameters, context):
         """
-        Clip the input layer to the provided polygon and buffer it.
+        Set up the output writer for the 'geopackage' or 'output_folder'
+        parameter, if one is given. Returns the parameter name and path, or
+        (None, None) if the layers go to their own outputs.
         """
-        # Create a timestamped output file name
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name = os.path.splitext(original_name)[0]
-        clipped_layer_path = os.path.join(tempfile.gettempdir(), f"clipped_{base_name}_{timestamp}.shp")
+        from .bgt_loader_geopackage import GeoPackageWriter
+        from . import bgt_loader_writers
+        geopackage_path = self.parameterAsFileOutput(parameters, 'geopackage', context)
+        folder_path = self.parameterAsFileOutput(parameters, 'output_folder', context)
+        if geopackage_path and folder_path:
+            raise QgsProcessingException("Choose either a GeoPackage or an output folder, not both.")
+
+        if geopackage_path:
+            self.output_writer = GeoPackageWriter(geopackage_path, index_fields=[self.LOKAAL_ID_FIELD])
+            return 'geopackage', geopackage_path
+        if folder_path:
+            _, writer_name = self.FOLDER_FORMATS[self.parameterAsEnum(parameters, 'output_folder_format', context)]
+            self.output_writer = getattr(bgt_loader_writers, writer_name)(folder_path)
+            return 'output_folder', folder_path
+        return None, None
 
-        # Create a buffered geometry from the input polygon WKT
+    def finish_output_writer(self, context):
+        """
+        Finalise the output writer (indexes included) and load its layers
+        into the project once the algorithm completes. Returns the layer
+        outputs.
+        """
+        self.output_writer.close()
+
+        outputs = {}
+        for layer_name in self.output_writer.layer_names():
+            uri = self.output_writer.layer_uri(layer_name)
+            context.addLayerToLoadOnCompletion(uri, QgsProcessingContext.LayerDetails(layer_name, context.project(), layer_name))
+            outputs[layer_name] = uri
+        return outputs
+
+    def load_layer(self, layer_name, file_path, streaming_threshold, feedback):
+        """
+        Open a BGT GML file as a layer in EPSG:28992. Files larger than the
+        streaming threshold are read with GmlLightLayer, which keeps memory
+        bounded, instead of OGR, which pre-scans the whole file. Returns None
+        if the file cannot be read.
+        """
+        from .bgt_loader_gml import GmlLightLayer, gml_size
+        if file_path.lower().endswith('.gml') and gml_size(file_path) > streaming_threshold:
+            feedback.pushInfo(f"Streaming large layer {layer_name}.")
+            layer = GmlLightLayer(file_path, layer_name, batch_size=self.SINK_BATCH_SIZE)
+        else:
+            layer = QgsVectorLayer(file_path, layer_name, "ogr")
+        if not layer.isValid():
+            feedback.pushInfo(f"Failed to load layer: {os.path.basename(file_path)}")
+            return None
+
+        # Set CRS to EPSG:28992 (Dutch RD New coordinate system)
+        layer.setCrs(QgsCoordinateReferenceSystem("EPSG:28992"))
+
+        # Skip filtered objects while reading, before their geometry is parsed
+        if self.read_filter is not None:
+            expression = self.filter_expression(self.read_filter, layer.fields())
+            if expression:
+                layer.setSubsetString(expression)
+        return layer
+
+    def create_read_filter(self, parameters, context):
+        """
+        Collect the attribute filters and field selection of the parameters.
+        Returns None if nothing is filtered. The filter is a plain dict, so it
+        can be stored with the local store.
+        """
+        def parse_list(value):
+            return sorted({item.strip() for item in (value or '').split(',') if item.strip()})
+
+        values = {}
+        for parameter_name, field_name in (('bgt_status', self.STATUS_FIELD), ('plus_type', self.PLUS_TYPE_FIELD)):
+            allowed = parse_list(self.parameterAsString(parameters, parameter_name, context))
+            if allowed:
+                values[field_name] = allowed
+
+        read_filter = {
+            'current_only': self.parameterAsBool(parameters, 'current_only', context),
+            'values': values,
+            'fields': parse_list(self.parameterAsString(parameters, 'fields', context)),
+        }
+        return read_filter if any(read_filter.values()) else None
+
+    def filter_expression(self, read_filter, fields):
+        """
+        Build the subset expression for a read filter, limited to the fields
+        the layer has. Returns None if no condition applies. The expression
+        is valid both as QGIS expression and as OGR attribute filter.
+        """
+        clauses = []
+        if read_filter['current_only'] and fields.lookupField(self.END_REGISTRATION_FIELD) >= 0:
+            clauses.append(f'"{self.END_REGISTRATION_FIELD}" IS NULL')
+        for field_name, allowed in sorted(read_filter['values'].items()):
+            if fields.lookupField(field_name) >= 0:
+                values = ", ".join(QgsExpression.quotedValue(value) for value in allowed)
+                clauses.append(f'"{field_name}" IN ({values})')
+        return " AND ".join(clauses) or None
+
+    def output_fields(self, layer):
+        """
+        Fields written for a layer: all of them, or the selected ones in the
+        order of the layer. The lokaalID is always kept, as objects are
+        de-duplicated on it. Primary keys of the source, like the fid of a
+        GeoPackage, are left out: the output assigns its own.
+        """
+        primary_keys = set(layer.dataProvider().pkAttributeIndexes())
+        selected = None
+        if self.read_filter is not None and self.read_filter['fields']:
+            selected = set(self.read_filter['fields']) | {self.LOKAAL_ID_FIELD}
+        output_fields = QgsFields()
+        for i, field in enumerate(layer.fields()):
+            if i not in primary_keys and (selected is None or field.name() in selected):
+                output_fields.append(field)
+        return output_fields
+
+    def attribute_subset(self, field_map, id_index=-1):
+        """
+        Indices of the source attributes a field map reads, plus the lokaalID
+        used for de-duplication, for QgsFeatureRequest.setSubsetOfAttributes.
+        """
+        return sorted({i for i in field_map if i >= 0} | ({id_index} if id_index >= 0 else set()))
+
+    def field_map(self, source_fields, target_fields):
+        """
+        Map every target field to the index of the source field with the same
+        name (-1 if missing). Returns None if the fields already line up.
+        """
+        mapping = [source_fields.lookupField(field.name()) for field in target_fields]
+        if mapping == list(range(source_fields.count())):
+            return None
+        return mapping
+
+    def create_output_profile(self, parameters, context):
+        """
+        Collect the output geometry settings of the parameters: the grid
+        coordinates are snapped to, the maximum deviation when curves are
+        linearised and the number of segments per quarter circle of the buffer.
+        """
+        return {
+            'grid_size': self.parameterAsDouble(parameters, 'grid_size', context),
+            'curve_tolerance': self.parameterAsDouble(parameters, 'curve_tolerance', context),
+            'buffer_segments': self.parameterAsInt(parameters, 'buffer_segments', context) or 1,
+        }
+
+    def linearise(self, geometry):
+        """
+        Replace the curves of a geometry by straight segments, deviating at
+        most the curve tolerance of the output profile if one is set.
+        """
+        tolerance = self.output_profile['curve_tolerance']
+        if tolerance > 0:
+            geometry.convertToStraightSegment(tolerance, QgsAbstractGeometry.MaximumDifference)
+        else:
+            geometry.convertToStraightSegment()
+
+    def quantise(self, geometry):
+        """
+        Snap a geometry to the grid of the output profile and remove the
+        vertices that became duplicates. Parts that collapse are dropped, so
+        the result can be empty.
+        """
+        grid_size = self.output_profile['grid_size']
+        snapped = geometry.snappedToGrid(grid_size, grid_size)
+        snapped.removeDuplicateNodes()
+        return snapped
+
+    def prepare_clip_geometry(self, polygon_wkt, buffer_distance):
+        """
+        Buffer the input polygon to the area features are clipped to.
+        """
         polygon_geometry = QgsGeometry.fromWkt(polygon_wkt)
-        buffered_geometry = polygon_geometry.buffer(buffer_distance, 1)
+        return polygon_geometry.buffer(buffer_distance, self.output_profile['buffer_segments'])
+
+    def create_clip_engine(self, buffered_geometry):
+        """
+        Create a prepared geometry engine for the buffered polygon, so repeated
+        intersects/contains tests against the area are cheap.
+        """
+        clip_engine = QgsGeometry.createGeometryEngine(buffered_geometry.constGet())
+        clip_engine.prepareGeometry()
+        return clip_engine
+
+    def output_wkb_type(self, layer):
+        """
+        Determine the geometry type of the output for a layer. Clipping can
+        split lines and polygons, so those are written as multi types.
+        """
+        geometry_type = layer.geometryType()
+        if geometry_type == QgsWkbTypes.LineGeometry:
+            return QgsWkbTypes.MultiLineString
+        elif geometry_type == QgsWkbTypes.PolygonGeometry:
+            return QgsWkbTypes.MultiPolygon
+        return QgsWkbTypes.Point
+
+    def clip_layer_to_polygon(self, layer, buffered_geometry, clip_engine, sink, feedback, sink_lock=None, progress_callback=None, extra_attributes=None, seen_ids=None, field_map=None):
+        """
+        Clip the input layer to the buffered polygon and write the result to
+        the sink, appending ``extra_attributes`` to every feature. See
+        clip_layer_to_areas.
+        """
+        return self.clip_layer_to_areas(
+            layer, [(extra_attributes, buffered_geometry)], sink, feedback, sink_lock, progress_callback,
+            seen_ids=seen_ids, field_map=field_map, clip_engines=[clip_engine]
+        )
+
+    def clip_layer_to_areas(self, layer, clip_areas, sink, feedback, sink_lock=None, progress_callback=None, seen_ids=None, field_map=None, clip_engines=None):
+        """
+        Clip the input layer to each of the (extra attributes, buffered
+        polygon) pairs of ``clip_areas`` and write the results to the sink in
+        batches, appending the extra attributes of the area to every feature.
+        The layer is read once: every feature is only clipped to the areas
+        whose bounding box it touches. Objects whose lokaalID is in
+        ``seen_ids`` are skipped, and written ones are added to it.
+        ``field_map`` (see field_map) reorders the attributes to the fields
+        of the sink. ``clip_engines`` are the prepared engines of the areas,
+        which are created if not given. Returns the number of features
+        written.
+        """
+        sink_lock = sink_lock or threading.Lock()
+        total = layer.featureCount() or 1
+        read_count = 0
 
         # Determine the layer's geometry type
         geometry_type = layer.geometryType()
         feedback.pushInfo(f"Layer geometryType: {geometry_type.name}")
-        
-        # Create an in-memory layer for the clipped data based on geometry type
-        if geometry_type == QgsWkbTypes.LineGeometry:
-            clipped_layer = QgsVectorLayer(f"LineString?crs={layer.crs().authid()}", "Temporary Layer", "memory")
-        else:
-            clipped_layer = QgsVectorLayer(f"{geometry_type.name}?crs={layer.crs().authid()}", "Temporary Layer", "memory")
-
-        # Add attributes and update fields
-        clipped_provider = clipped_layer.dataProvider()
-        clipped_provider.addAttributes(layer.fields())
-        clipped_layer.updateFields()
-        
-        # Clip features to the buffered geometry
-        for feature in layer.getFeatures():
+        is_multi = QgsWkbTypes.isMultiType(self.output_wkb_type(layer))
+
+        # Prepared geometry engines are not thread-safe, so each call has its own
+        clip_engines = clip_engines or [self.create_clip_engine(buffered_geometry) for _, buffered_geometry in clip_areas]
+
+        # Features are de-duplicated per source area on their lokaalID
+        id_index = layer.fields().lookupField(self.LOKAAL_ID_FIELD) if seen_ids is not None else -1
+        source_keys = [tuple(extra_attributes or []) for extra_attributes, _ in clip_areas]
+
+        # Only fetch features whose bounding box touches an area, and only the
+        # attributes that are written
+        extent = QgsRectangle(clip_areas[0][1].boundingBox())
+        for _, buffered_geometry in clip_areas[1:]:
+            extent.combineExtentWith(buffered_geometry.boundingBox())
+        request = QgsFeatureRequest().setFilterRect(extent)
+        if field_map is not None:
+            request.setSubsetOfAttributes(self.attribute_subset(field_map, id_index))
+
+        # Index the areas by their bounding boxes, to find the areas of a feature
+        area_index = None
+        if len(clip_areas) > 1:
+            area_index = QgsSpatialIndex()
+            for i, (_, buffered_geometry) in enumerate(clip_areas):
+                area_index.addFeature(i, buffered_geometry.boundingBox())
+
+        batch = []
+        batch_keys = []
+        feature_count = 0
+        start = time.perf_counter()
+        write_time = 0.0
+
+        def flush(batch, batch_keys):
+            nonlocal write_time
+            write_start = time.perf_counter()
+            with sink_lock:
+                if id_index >= 0:
+                    batch = [feature for feature, key in zip(batch, batch_keys) if key not in seen_ids]
+                    seen_ids.update(batch_keys)
+                sink.addFeatures(batch, QgsFeatureSink.FastInsert)
+            write_time += time.perf_counter() - write_start
+            return len(batch)
+
+        # Clip features to the buffered geometries
+        for feature in layer.getFeatures(request):
+            if feedback.isCanceled():
+                break
+            read_count += 1
+
             geom = feature.geometry()
-            if geom.intersects(buffered_geometry):
+            if geom.isNull():
+                continue
+
+            attributes = feature.attributes()
+            if field_map is not None:
+                attributes = [attributes[i] if i >= 0 else None for i in field_map]
+
+            area_indices = [0] if area_index is None else sorted(area_index.intersects(geom.boundingBox()))
+            for i in area_indices:
+                extra_attributes, buffered_geometry = clip_areas[i]
+                clipped_geom = self.clip_geometry(geom, buffered_geometry, clip_engines[i], geometry_type, is_multi)
+                if clipped_geom is None:
+                    continue
+
                 clipped_feature = QgsFeature()
-                clipped_feature.setGeometry(geom.intersection(buffered_geometry))
-                clipped_feature.setAttributes(feature.attributes())
-                clipped_provider.addFeature(clipped_feature)
+                clipped_feature.setGeometry(clipped_geom)
+                clipped_feature.setAttributes(attributes + (extra_attributes or []))
+                batch.append(clipped_feature)
+                if id_index >= 0:
+                    batch_keys.append((source_keys[i], feature.attribute(id_index)))
+
+            # Flush full batches to the sink
+            if len(batch) >= self.SINK_BATCH_SIZE:
+                feature_count += flush(batch, batch_keys)
+                batch = []
+                batch_keys = []
+                if progress_callback:
+                    progress_callback(min(read_count / total, 1.0))
+
+        if batch:
+            feature_count += flush(batch, batch_keys)
+
+        self.report.add_layer(
+            layer.name(),
+            clip_s=time.perf_counter() - start - write_time,
+            write_s=write_time,
+            features_in=read_count,
+            features_out=feature_count
+        )
+        return feature_count
+
+    def clip_geometry(self, geom, buffered_geometry, clip_engine, geometry_type, is_multi):
+        """
+        Clip a single geometry to a buffered polygon and bring it to the
+        output profile and geometry type of the sink. Returns None if nothing
+        of it is left.
+        """
+        if not clip_engine.intersects(geom.constGet()):
+            return None
+
+        if clip_engine.contains(geom.constGet()):
+            # Completely inside the area: copy unchanged
+            clipped_geom = QgsGeometry(geom)
+        else:
+            if self.output_profile['curve_tolerance'] > 0 and QgsWkbTypes.isCurvedType(geom.wkbType()):
+                # Linearise at the requested tolerance before GEOS does so at its own
+                self.linearise(geom)
+            clipped_geom = geom.intersection(buffered_geometry)
+            if QgsWkbTypes.flatType(clipped_geom.wkbType()) == QgsWkbTypes.GeometryCollection:
+                # Drop lower-dimension parts where the feature only touches the boundary
+                clipped_geom.convertGeometryCollectionToSubclass(geometry_type)
+            if clipped_geom.isEmpty():
+                return None
+
+        # Match the geometry type of the sink
+        if QgsWkbTypes.isCurvedType(clipped_geom.wkbType()):
+            self.linearise(clipped_geom)
+        if self.output_profile['grid_size'] > 0:
+            clipped_geom = self.quantise(clipped_geom)
+            if clipped_geom.isEmpty():
+                return None
+        if is_multi:
+            clipped_geom.convertToMultiType()
+        return clipped_geom
+
+    def clip_layer_vectorised(self, layer, buffered_geometry, sink, feedback, sink_lock=None, progress_callback=None, extra_attributes=None, seen_ids=None, field_map=None):
+        """
+        Variant of clip_layer_to_polygon that clips whole batches of WKB
+        geometries at once with shapely, see clip_layer_vectorised_to_areas.
+        """
+        return self.clip_layer_vectorised_to_areas(
+            layer, [(extra_attributes, buffered_geometry)], sink, feedback, sink_lock, progress_callback,
+            seen_ids=seen_ids, field_map=field_map
+        )
+
+    def clip_layer_vectorised_to_areas(self, layer, clip_areas, sink, feedback, sink_lock=None, progress_callback=None, seen_ids=None, field_map=None):
+        """
+        Variant of clip_layer_to_areas that clips whole batches of WKB
+        geometries at once with shapely, see bgt_loader_vector. Every batch
+        is parsed once for all areas. Features are only created for the
+        clipped results, when they are written.
+
+        OGR layers are read through the OGR Arrow stream, which also carries
+        the attributes needed; they are only converted for the kept
+        features. Other layers are read through QGIS, carrying their
+        attributes along as columns. Either way every file is read once, in
+        sequence: GML has no random access, so fetching features by id
+        would re-read the file for every feature.
+        """
+        from . import bgt_loader_vector
+        sink_lock = sink_lock or threading.Lock()
+        total = layer.featureCount() or 1
+        read_count = 0
+
+        dimension = {
+            QgsWkbTypes.PointGeometry: bgt_loader_vector.POINT,
+            QgsWkbTypes.LineGeometry: bgt_loader_vector.LINE,
+        }.get(layer.geometryType(), bgt_loader_vector.POLYGON)
+        is_multi = QgsWkbTypes.isMultiType(self.output_wkb_type(layer))
+        areas = [bgt_loader_vector.prepared_area(buffered_geometry) for _, buffered_geometry in clip_areas]
+        rect = QgsRectangle(clip_areas[0][1].boundingBox())
+        for _, buffered_geometry in clip_areas[1:]:
+            rect.combineExtentWith(buffered_geometry.boundingBox())
+
+        id_index = layer.fields().lookupField(self.LOKAAL_ID_FIELD) if seen_ids is not None else -1
+        source_keys = [tuple(extra_attributes or []) for extra_attributes, _ in clip_areas]
+
+        # Attributes to read: those the field map writes and the lokaalID, or all
+        field_indices = self.attribute_subset(field_map, id_index) if field_map is not None else range(layer.fields().count())
+        field_names = [layer.fields().at(i).name() for i in field_indices]
+
+        def qgis_batches():
+            # Geometries as a WKB array, attributes as one column per field
+            request = QgsFeatureRequest().setFilterRect(rect)
+            if field_map is not None:
+                request.setSubsetOfAttributes(list(field_indices))
+            fids, wkbs, columns = [], [], [[] for _ in range(layer.fields().count())]
+            for feature in layer.getFeatures(request):
+                geometry = feature.geometry()
+                fids.append(feature.id())
+                wkbs.append(None if geometry.isNull() else bytes(geometry.asWkb()))
+                for column, value in zip(columns, feature.attributes()):
+                    column.append(value)
+                if len(fids) >= self.SINK_BATCH_SIZE:
+                    yield fids, wkbs, lambda kept, columns=columns: [[column[i] for column in columns] for i in kept]
+                    fids, wkbs, columns = [], [], [[] for _ in range(layer.fields().count())]
+            if fids:
+                yield fids, wkbs, lambda kept, columns=columns: [[column[i] for column in columns] for i in kept]
+
+        def ogr_batches(batches):
+            for fids, wkbs, columns in batches:
+                def rows(kept, columns=columns):
+                    # Attribute rows in the field order of the layer, unread fields left empty
+                    values = [
+                        bgt_loader_vector.column_values(columns[field.name()], kept) if field.name() in columns else [None] * len(kept)
+                        for field in layer.fields()
+                    ]
+                    return [list(row) for row in zip(*values)] if values else [[] for _ in kept]
+                yield fids, wkbs, rows
+
+        batches = None
+        if getattr(layer, 'providerType', lambda: None)() == 'ogr':
+            batches = bgt_loader_vector.ogr_wkb_batches(layer.source(), rect, self.SINK_BATCH_SIZE, where=layer.subsetString() or None, fields=field_names)
+        batches = ogr_batches(batches) if batches is not None else qgis_batches()
+
+        feature_count = 0
+        start = time.perf_counter()
+        write_time = 0.0
+        for fids, wkbs, rows in batches:
+            if feedback.isCanceled():
+                break
+            read_count += len(fids)
+
+            clipped_areas = bgt_loader_vector.clip_to_areas(
+                wkbs, areas, dimension, is_multi,
+                grid_size=self.output_profile['grid_size'],
+                curve_tolerance=self.output_profile['curve_tolerance']
+            )
+            for area_index, kept, clipped_wkbs in clipped_areas:
+                extra_attributes = clip_areas[area_index][0]
+                write_start = time.perf_counter()
+                batch = []
+                batch_keys = []
+                for row, wkb in zip(rows(kept), clipped_wkbs):
+                    geometry = QgsGeometry()
+                    geometry.fromWkb(wkb)
+                    clipped_feature = QgsFeature()
+                    clipped_feature.setGeometry(geometry)
+                    if id_index >= 0:
+                        batch_keys.append((source_keys[area_index], row[id_index]))
+                    if field_map is not None:
+                        row = [row[i] if i >= 0 else None for i in field_map]
+                    clipped_feature.setAttributes(list(row) + (extra_attributes or []))
+                    batch.append(clipped_feature)
 
-        # Save the clipped layer as a shapefile
-        QgsVectorFileWriter.writeAsVectorFormat(clipped_layer, clipped_layer_path, "utf-8", QgsCoordinateReferenceSystem("EPSG:28992"), "ESRI Shapefile")
+                with sink_lock:
+                    if id_index >= 0:
+                        batch = [feature for feature, key in zip(batch, batch_keys) if key not in seen_ids]
+                        seen_ids.update(batch_keys)
+                    sink.addFeatures(batch, QgsFeatureSink.FastInsert)
+                feature_count += len(batch)
+                write_time += time.perf_counter() - write_start
 
-        # Load the clipped layer back into QGIS for further use
-        clipped_layer = QgsVectorLayer(clipped_layer_path, f"{base_name}_{timestamp}", "ogr")
-        if not clipped_layer.isValid():
-            raise QgsProcessingException(f"Error loading clipped layer: {clipped_layer_path}")
+            if progress_callback:
+                progress_callback(min(read_count / total, 1.0))
 
-        return clipped_layer
+        self.report.add_layer(
+            layer.name(),
+            clip_s=time.perf_counter() - start - write_time,
+            write_s=write_time,
+            features_in=read_count,
+            features_out=feature_count
+        )
+        return feature_count
 
     def name(self):
         return 'bgtloader'
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary QGIS libraries
+from qgis.core import ( # type: ignore
+    QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsFeature,
+    QgsGeometry,
+    QgsProcessingContext,
+    QgsProcessingException,
+    QgsProcessingFeedback,
+    QgsProject,
+    QgsVectorLayer,
+)
+
+# Import necessary standard libraries
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from .bgt_loader_algorithm import BgtLoaderAlgorithm
+
+BGT_CRS = "EPSG:28992"
+OUTPUT_FORMATS = {'gpkg': None, 'fgb': 0, 'parquet': 1}  # Output format -> index in BgtLoaderAlgorithm.FOLDER_FORMATS
+
+
+def start_qgis():
+    """
+    Initialise QGIS for use outside the GUI, unless an application (QGIS
+    itself, qgis_process) is already running. Returns the application.
+    """
+    app = QgsApplication.instance()
+    if app is None:
+        app = QgsApplication([], False)
+        app.initQgis()
+    return app
+
+
+def read_aois(path, name_field=None):
+    """
+    Read areas of interest from any vector file OGR can open. Returns a list
+    of (name, wkt) tuples in EPSG:28992. Names come from ``name_field`` or,
+    without one, from the feature ids.
+    """
+    layer = QgsVectorLayer(path, 'aois', 'ogr')
+    if not layer.isValid():
+        raise QgsProcessingException(f"Could not open areas of interest: {path}")
+
+    transform = QgsCoordinateTransform(layer.crs(), QgsCoordinateReferenceSystem(BGT_CRS), QgsProject.instance())
+    aois = []
+    for feature in layer.getFeatures():
+        geometry = feature.geometry()
+        if geometry.isNull() or geometry.isEmpty():
+            continue
+        geometry.transform(transform)
+        name = str(feature[name_field]) if name_field else str(feature.id())
+        aois.append((name, geometry.asWkt()))
+    return aois
+
+
+def extract(aoi_wkt, layers, output_path, buffer_distance=0.0, report_path=None, feedback=None, output_format='gpkg', **options):
+    """
+    Download the BGT layers around one area of interest (WKT in EPSG:28992)
+    and write them into the GeoPackage at ``output_path``. With an
+    ``output_format`` of 'fgb' or 'parquet', ``output_path`` is a directory
+    receiving one FlatGeobuf or GeoParquet file per layer instead.
+
+    ``options`` are passed on as parameters of the processing algorithm, e.g.
+    ``use_cache``, ``max_workers`` or ``tile_area_km2``. Returns the outputs
+    of the algorithm.
+    """
+    feedback = feedback or QgsProcessingFeedback()
+    context = QgsProcessingContext()
+
+    # The algorithm reads its area from a feature source
+    aoi_layer = QgsVectorLayer(f"Polygon?crs={BGT_CRS}", 'aoi', 'memory')
+    aoi_feature = QgsFeature()
+    aoi_feature.setGeometry(QgsGeometry.fromWkt(aoi_wkt))
+    aoi_layer.dataProvider().addFeatures([aoi_feature])
+
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    parameters = dict(options)
+    parameters.update({
+        BgtLoaderAlgorithm.POLYGON: aoi_layer,
+        'buffer_distance': buffer_distance,
+        'report': report_path,
+    })
+    if output_format == 'gpkg':
+        parameters['geopackage'] = output_path
+    else:
+        parameters['output_folder'] = output_path
+        parameters['output_folder_format'] = OUTPUT_FORMATS[output_format]
+    # A layer is selected by giving its output a value; the writer replaces the outputs
+    parameters.update({layer_name: 'TEMPORARY_OUTPUT' for layer_name in layers})
+
+    algorithm = BgtLoaderAlgorithm().create()
+    outputs, ok = algorithm.run(parameters, context, feedback)
+    if not ok:
+        raise QgsProcessingException(f"BGT extract failed for {output_path}")
+    return outputs
+
+
+def extract_many(aois, layers, output_dir, workers=2, buffer_distance=0.0, reports=False, feedback_factory=None, output_format='gpkg', **options):
+    """
+    Run extract() for many (name, wkt) areas of interest, at most ``workers``
+    at the same time. Every area is written to ``<output_dir>/<name>.gpkg``,
+    or to the directory ``<output_dir>/<name>`` for the other output formats.
+
+    Returns a dict mapping each name to the outputs of its extract, or to the
+    exception it failed with, so one failing area does not stop the others.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    def run(name):
+        # Names end up in file names, so keep them to safe characters
+        file_name = re.sub(r'[^\w.-]', '_', name)
+        output_path = os.path.join(output_dir, f"{file_name}.gpkg" if output_format == 'gpkg' else file_name)
+        return extract(
+            wkts[name], layers, output_path,
+            buffer_distance=buffer_distance,
+            report_path=os.path.join(output_dir, f"{file_name}.json") if reports else None,
+            feedback=feedback_factory(name) if feedback_factory else None,
+            output_format=output_format,
+            **options
+        )
+
+    aois = list(aois)
+    wkts = dict(aois)
+    if len(wkts) != len(aois):
+        raise ValueError("The names of the areas of interest must be unique.")
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {name: executor.submit(run, name) for name in wkts}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = e
+    return results
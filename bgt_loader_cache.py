@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary standard libraries
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from .bgt_loader_workspace import link_into, process_alive
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# One lock per cache directory, shared by all cache instances of this process
+_directory_locks = {}
+_directory_locks_guard = threading.Lock()
+
+
+def _directory_lock(cache_dir):
+    key = os.path.normcase(os.path.abspath(cache_dir))
+    with _directory_locks_guard:
+        return _directory_locks.setdefault(key, threading.Lock())
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            pass  # LK_LOCK gives up after ten seconds, keep waiting
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class BgtDownloadCache:
+    """
+    Persistent on-disk cache of PDOK custom-download archives.
+
+    Archives are stored under a key derived from the normalised request
+    payload. Entries expire after a TTL and the least recently used entries
+    are evicted when the cache grows beyond its size limit.
+
+    The index is only changed under a lock shared by all instances for the
+    same directory in this process and a lock file shared with other
+    processes, so concurrent requests and QGIS instances do not lose entries.
+    Cached archives are read in place: get and find_superset pin the entry,
+    and pinned entries are not evicted until release is called.
+    """
+
+    INDEX_FILE = 'index.json'
+    LOCK_FILE = 'index.lock'
+    PIN_MAX_AGE = 24 * 3600  # Seconds after which a pin that cannot be checked is considered stale
+
+    def __init__(self, cache_dir, ttl_seconds, max_size_bytes):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+        self._lock = _directory_lock(cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(base_url, geofilter, featuretypes, data_format):
+        """
+        Build the cache key for a request to the service at ``base_url``. The
+        geofilter is expected to be normalised WKT already.
+        """
+        normalised = json.dumps({
+            'base_url': base_url,
+            'format': data_format.lower(),
+            'geofilter': geofilter,
+            'featuretypes': sorted(featuretypes),
+        }, sort_keys=True)
+        return hashlib.sha256(normalised.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Pin the cached archive for the key and return its path, or None.
+        Call release with the path when done reading it.
+        """
+        with self._locked():
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is None or not self._is_usable(key, entry):
+                return None
+            return self._pin(index, key)
+
+    def find_superset(self, base_url, featuretypes, data_format, covers):
+        """
+        Pin a cached archive from the service at ``base_url`` that contains
+        all requested featuretypes for an area covering the requested one and
+        return its path, or None. Call release with the path when done.
+
+        ``covers`` is called with the cached geofilter WKT and must return
+        True if that area covers the requested area.
+        """
+        with self._locked():
+            index = self._read_index()
+            requested = set(featuretypes)
+
+            # Prefer the smallest matching archive, it is the cheapest to clip
+            candidates = sorted(index.items(), key=lambda item: item[1].get('size', 0))
+            for key, entry in candidates:
+                if entry.get('base_url') != base_url or entry.get('format') != data_format.lower():
+                    continue
+                if not requested.issubset(entry.get('featuretypes', [])):
+                    continue
+                if not self._is_usable(key, entry) or not covers(entry['geofilter']):
+                    continue
+                return self._pin(index, key)
+
+        return None
+
+    def release(self, path):
+        """
+        Unpin an archive returned by get or find_superset, so it can be
+        evicted again.
+        """
+        key = os.path.splitext(os.path.basename(path))[0]
+        with self._locked():
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is None:
+                return
+            owner = self._pin_owner(None)
+            pins = entry.get('pins', [])
+            own = next((pin for pin in pins if all(pin.get(field) == owner[field] for field in ('host', 'pid', 'thread'))), None)
+            if own is not None:
+                pins.remove(own)
+                self._write_index(index)
+
+    def put(self, key, archive_path, base_url, geofilter, featuretypes, data_format):
+        """
+        Add a hard link (or copy) of a downloaded archive to the cache. The
+        caller keeps reading its own archive, whose path is returned. If the
+        key is cached already, e.g. by another caller of a shared request,
+        the cached archive is kept.
+        """
+        with self._locked():
+            cached_path = self._archive_path(key)
+            index = self._read_index()
+            if key in index and (self._is_usable(key, index[key]) or self._is_pinned(index[key])):
+                return archive_path  # Cached already, or expired but still being read
+            if os.path.exists(cached_path):
+                os.remove(cached_path)  # Expired
+            if link_into(archive_path, self.cache_dir, os.path.basename(cached_path)) is None:
+                return archive_path
+
+            now = time.time()
+            index[key] = {
+                'base_url': base_url,
+                'geofilter': geofilter,
+                'featuretypes': sorted(featuretypes),
+                'format': data_format.lower(),
+                'created': now,
+                'last_used': now,
+                'size': os.path.getsize(cached_path),
+            }
+            self._evict(index, keep=key)
+            self._write_index(index)
+            return archive_path
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, open(os.path.join(self.cache_dir, self.LOCK_FILE), 'a+b') as lock_file:
+            _lock_file(lock_file)
+            try:
+                yield
+            finally:
+                _unlock_file(lock_file)
+
+    def _evict(self, index, keep=None):
+        """
+        Drop expired entries, then least recently used entries until the
+        cache fits in its size limit.
+        """
+        # Archives missing from the index, e.g. left by a crashed run, count towards the limit too
+        for file_name in os.listdir(self.cache_dir):
+            key, extension = os.path.splitext(file_name)
+            if extension != '.zip' or key in index:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, file_name))
+            except OSError:
+                continue
+            index[key] = {'base_url': None, 'geofilter': None, 'featuretypes': [], 'format': None, 'created': stat.st_mtime, 'last_used': stat.st_mtime, 'size': stat.st_size}
+
+        for key, entry in list(index.items()):
+            if key != keep and not self._is_usable(key, entry) and not self._is_pinned(entry):
+                self._remove(index, key)
+
+        total_size = sum(entry.get('size', 0) for entry in index.values())
+        for key, entry in sorted(index.items(), key=lambda item: item[1].get('last_used', 0)):
+            if total_size <= self.max_size_bytes:
+                break
+            if key == keep or self._is_pinned(entry):
+                continue
+            total_size -= entry.get('size', 0)
+            self._remove(index, key)
+
+    def _remove(self, index, key):
+        index.pop(key, None)
+        try:
+            os.remove(self._archive_path(key))
+        except OSError:
+            pass
+
+    def _pin(self, index, key):
+        entry = index[key]
+        entry['last_used'] = time.time()
+        entry['pins'] = [pin for pin in entry.get('pins', []) if self._pin_alive(pin)]
+        entry['pins'].append(self._pin_owner(entry['last_used']))
+        self._write_index(index)
+        return self._archive_path(key)
+
+    @staticmethod
+    def _pin_owner(pinned_at):
+        return {'host': socket.gethostname(), 'pid': os.getpid(), 'thread': threading.get_ident(), 'time': pinned_at}
+
+    def _pin_alive(self, pin):
+        # Pins of other hosts and on Windows cannot be checked: go by age
+        if pin.get('host') == socket.gethostname() and os.name != 'nt':
+            return process_alive(pin.get('pid'))
+        return time.time() - pin.get('time', 0) <= self.PIN_MAX_AGE
+
+    def _is_pinned(self, entry):
+        return any(self._pin_alive(pin) for pin in entry.get('pins', []))
+
+    def _is_usable(self, key, entry):
+        if time.time() - entry.get('created', 0) > self.ttl_seconds:
+            return False
+        return os.path.exists(self._archive_path(key))
+
+    def _archive_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.zip")
+
+    def _read_index(self):
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        # Write to a temporary file first so readers never see a partial index
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
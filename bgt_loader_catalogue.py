@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+
+Catalogue of the BGT layers offered by the download tool. The layers come
+from a manifest cached in the QGIS profile, or from the list shipped with the
+plugin when there is none. Refresh the manifest from PDOK with:
+
+    python -m bgt_loader.bgt_loader_catalogue
+"""
+
+# Import necessary standard libraries
+import json
+import os
+import re
+import threading
+import time
+
+MANIFEST_ENV = 'BGT_LOADER_LAYER_MANIFEST'  # Environment variable pointing to another manifest file
+DATASET_PATH = "/lv/bgt/download/v1_0/dataset"  # Dataset description of the PDOK download API, listing its featuretypes
+
+# Layers shipped with the plugin, used when no manifest has been cached
+DEFAULT_LAYERS = (
+    'bak', 'begroeidterreindeel', 'bord', 'buurt', 'functioneelgebied',
+    'gebouwinstallatie', 'installatie', 'kast', 'kunstwerkdeel', 'mast',
+    'onbegroeidterreindeel', 'ondersteunendwaterdeel', 'ondersteunendwegdeel',
+    'ongeclassificeerdobject', 'openbareruimte', 'openbareruimtelabel',
+    'overbruggingsdeel', 'overigbouwwerk', 'overigescheiding', 'paal', 'pand',
+    'plaatsbepalingspunt', 'put', 'scheiding', 'sensor', 'spoor', 'stadsdeel',
+    'straatmeubilair', 'tunneldeel', 'vegetatieobject', 'waterdeel',
+    'waterinrichtingselement', 'waterschap', 'wegdeel', 'weginrichtingselement', 'wijk',
+)
+
+_LAYER_NAME = re.compile(r'^[a-z]+$')  # Layer names end up in file names and parameter names
+
+_layers = None
+_layers_lock = threading.Lock()
+
+
+def manifest_path():
+    """
+    Path of the cached layer manifest.
+    """
+    path = os.environ.get(MANIFEST_ENV)
+    if path:
+        return path
+    from qgis.core import QgsApplication # type: ignore
+    return os.path.join(QgsApplication.qgisSettingsDirPath(), 'bgt_loader', 'layers.json')
+
+
+def layer_names():
+    """
+    Return the BGT layers, read from the manifest on first use. A missing
+    or unreadable manifest falls back to DEFAULT_LAYERS.
+    """
+    global _layers
+    with _layers_lock:
+        if _layers is None:
+            _layers = _read_manifest(manifest_path()) or DEFAULT_LAYERS
+        return _layers
+
+
+def refresh_manifest(client=None):
+    """
+    Fetch the featuretypes of the PDOK download API and cache them as the
+    layer manifest. Algorithms created afterwards offer the new layers.
+    Returns the layers; raises ValueError if PDOK lists none.
+    """
+    global _layers
+    if client is None:
+        from .bgt_loader_client import shared_client
+        client = shared_client()
+
+    response = client.get(DATASET_PATH, headers={'Accept': 'application/json'})
+    response.raise_for_status()
+    layers = _parse_featuretypes(response.json())
+    if not layers:
+        raise ValueError(f"No featuretypes found at {client.url(DATASET_PATH)}")
+
+    path = manifest_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'layers': list(layers), 'source': client.url(DATASET_PATH), 'refreshed': time.time()}, f, indent=2)
+    os.replace(temp_path, path)  # Atomic, so concurrent QGIS starts never read half a manifest
+
+    with _layers_lock:
+        _layers = layers
+    return layers
+
+
+def _read_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict):
+        return None
+    return _valid_layers(manifest.get('layers'))
+
+
+def _parse_featuretypes(dataset):
+    # Featuretypes are listed by name, or as objects carrying their name
+    featuretypes = dataset.get('featuretypes') if isinstance(dataset, dict) else None
+    if not isinstance(featuretypes, list):
+        return None
+    names = [item.get('name') if isinstance(item, dict) else item for item in featuretypes]
+    return _valid_layers(names)
+
+
+def _valid_layers(names):
+    if not isinstance(names, list):
+        return None
+    layers = tuple(sorted({name for name in names if isinstance(name, str) and _LAYER_NAME.match(name)}))
+    return layers or None
+
+
+if __name__ == '__main__':
+    from .bgt_loader_api import start_qgis
+    start_qgis()  # Resolves the QGIS profile holding the manifest
+    refreshed = refresh_manifest()
+    print(f"{len(refreshed)} layers written to {manifest_path()}")
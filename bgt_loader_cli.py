@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+
+Command line entry point for unattended BGT extracts of many areas. Run it
+from the QGIS plugins directory with the Python of a QGIS installation:
+
+    python -m bgt_loader.bgt_loader_cli areas.gpkg --layers pand wegdeel --output-dir extracts
+"""
+
+# Import necessary QGIS libraries
+from qgis.core import QgsProcessingFeedback # type: ignore
+
+# Import necessary standard libraries
+import argparse
+import sys
+import threading
+
+from .bgt_loader_api import OUTPUT_FORMATS, extract_many, read_aois, start_qgis
+from .bgt_loader_catalogue import layer_names
+
+
+class ConsoleFeedback(QgsProcessingFeedback):
+    """
+    Feedback printing the messages of one area, prefixed with its name.
+    """
+
+    _print_lock = threading.Lock()
+
+    def __init__(self, name, verbose=False):
+        super().__init__()
+        self.name = name
+        self.verbose = verbose
+
+    def _print(self, message, stream):
+        with self._print_lock:
+            print(f"[{self.name}] {message}", file=stream, flush=True)
+
+    def pushInfo(self, info):
+        if self.verbose:
+            self._print(info, sys.stdout)
+
+    def pushWarning(self, warning):
+        self._print(warning, sys.stderr)
+
+    def reportError(self, error, fatalError=False):
+        self._print(error, sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download and clip BGT layers for every area in a vector file, writing one GeoPackage (or folder of files) per area.")
+    parser.add_argument('aois', help="Vector file with the areas of interest (any format OGR can read)")
+    parser.add_argument('--layers', nargs='+', required=True, metavar='LAYER', help="BGT layers to download")
+    parser.add_argument('--output-dir', required=True, help="Directory receiving <name>.gpkg, or a <name> folder, per area")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='gpkg', help="Output format: one GeoPackage, or a folder of FlatGeobuf or GeoParquet files per area")
+    parser.add_argument('--name-field', help="Attribute naming the areas (default: feature id)")
+    parser.add_argument('--buffer', type=float, default=0.0, help="Buffer distance around the areas in meters")
+    parser.add_argument('--workers', type=int, default=2, help="Areas processed at the same time")
+    parser.add_argument('--layer-workers', type=int, default=2, help="Layers processed at the same time per area")
+    parser.add_argument('--current-only', action='store_true', help="Skip objects with an eindRegistratie")
+    parser.add_argument('--bgt-status', help="Comma-separated bgt-status values to keep, e.g. bestaand")
+    parser.add_argument('--plus-type', help="Comma-separated plus-type values to keep")
+    parser.add_argument('--fields', help="Comma-separated fields to write (default: all)")
+    parser.add_argument('--offline-store', help="Local BGT extract (see bgtloader:bgtimport) to clip from instead of PDOK")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the local download cache")
+    parser.add_argument('--reports', action='store_true', help="Write a JSON run report next to the output of every area")
+    parser.add_argument('--verbose', action='store_true', help="Print progress messages, not only warnings and errors")
+    args = parser.parse_args(argv)
+
+    start_qgis()
+    # The layer catalogue lives in the QGIS profile, so it is checked once QGIS runs
+    unknown_layers = sorted(set(args.layers) - set(layer_names()))
+    if unknown_layers:
+        parser.error(f"unknown layers: {', '.join(unknown_layers)} (choose from {', '.join(layer_names())})")
+    aois = read_aois(args.aois, args.name_field)
+    print(f"Extracting {len(aois)} areas with {args.workers} workers.")
+
+    results = extract_many(
+        aois, args.layers, args.output_dir,
+        workers=args.workers,
+        buffer_distance=args.buffer,
+        reports=args.reports,
+        feedback_factory=lambda name: ConsoleFeedback(name, args.verbose),
+        output_format=args.format,
+        max_workers=args.layer_workers,
+        use_cache=not args.no_cache,
+        current_only=args.current_only,
+        bgt_status=args.bgt_status,
+        plus_type=args.plus_type,
+        fields=args.fields,
+        offline_store=args.offline_store,
+    )
+
+    failed = [name for name, result in results.items() if isinstance(result, Exception)]
+    for name in failed:
+        print(f"[{name}] failed: {results[name]}", file=sys.stderr)
+    print(f"{len(results) - len(failed)} of {len(results)} areas extracted into {args.output_dir}.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary standard libraries
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+DEFAULT_BASE_URL = "https://api.pdok.nl"
+BASE_URL_ENV = 'BGT_LOADER_PDOK_URL'  # Environment variable pointing the plugin at another PDOK host
+
+
+class PdokClient:
+    """
+    HTTP client for the PDOK download API.
+
+    All calls share one pooled, keep-alive session. Connection errors and
+    429/5xx responses are retried with jittered exponential backoff, honouring
+    Retry-After. Other methods than the idempotent ones are only retried when
+    the request was certainly not processed. The transport adapter can be
+    replaced, e.g. to talk to a local PDOK stand-in.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    NON_IDEMPOTENT_RETRY_STATUSES = (429,)  # Rejected before processing; a 5xx may come after the job was created
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')  # Safe to resend whenever they failed
+    CANCEL_CHECK_INTERVAL = 0.2  # Seconds between cancellation checks while waiting to retry
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, transport=None, max_retries=4, backoff=0.5, max_backoff=30, timeout=(10, 60), pool_size=16):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = transport or HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def url(self, path):
+        """
+        Resolve a path (or an absolute URL) against the base URL.
+        """
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}{path}"
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def request(self, method, path, is_canceled=None, **kwargs):
+        """
+        Send a request, retrying connection errors and retryable statuses.
+        A POST is only resent after a 429 or when no connection could be
+        made: after a read timeout, a dropped connection or a 5xx it may
+        have been received, and resending it would e.g. start a second PDOK
+        download job. ``is_canceled`` is checked while waiting to retry;
+        once it returns True the last response is returned or the last error
+        raised. Raises requests.RequestException once the retries are used up.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        url = self.url(path)
+        idempotent = method.upper() in self.IDEMPOTENT_METHODS
+        retry_statuses = self.RETRY_STATUSES if idempotent else self.NON_IDEMPOTENT_RETRY_STATUSES
+
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries or not (idempotent or self._not_connected(e)):
+                    raise
+                if not self._wait(self._backoff_delay(attempt), is_canceled):
+                    raise
+                attempt += 1
+                continue
+
+            if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                return response
+
+            delay = self._retry_after(response)
+            if delay is None:
+                delay = self._backoff_delay(attempt)
+            if not self._wait(delay, is_canceled):
+                return response
+            response.close()
+            attempt += 1
+
+    def _wait(self, delay, is_canceled):
+        # Sleep in short steps, returning False as soon as the caller cancels
+        wake_up = time.monotonic() + delay
+        while is_canceled is None or not is_canceled():
+            remaining = wake_up - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(self.CANCEL_CHECK_INTERVAL, remaining) if is_canceled is not None else remaining)
+        return False
+
+    def _not_connected(self, error):
+        # Connect timeouts and refused or unresolvable connections fail before anything is sent
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = error.args[0] if error.args else None
+        reason = getattr(reason, 'reason', reason)  # urllib3 wraps the cause in a MaxRetryError
+        return isinstance(reason, NewConnectionError)
+
+    def _backoff_delay(self, attempt):
+        # Full jitter keeps concurrent clients from retrying in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _retry_after(self, response):
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return min(float(value), self.max_backoff)
+        except ValueError:
+            pass
+        try:
+            return min(max(parsedate_to_datetime(value).timestamp() - time.time(), 0), self.max_backoff)
+        except (TypeError, ValueError):
+            return None
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def shared_client():
+    """
+    Return the process-wide PDOK client, created on first use.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = PdokClient(os.environ.get(BASE_URL_ENV, DEFAULT_BASE_URL))
+        return _shared_client
+
+
+def set_shared_client(client):
+    """
+    Replace the process-wide PDOK client, e.g. with one using another transport.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        _shared_client = client
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary standard libraries
+import hashlib
+import json
+import threading
+
+from .bgt_loader_workspace import link_into
+
+
+class _Flight:
+    """
+    A download in progress and the directories of the callers waiting for it.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.destinations = {}  # Waiting caller's directory -> path of its copy
+        self.path = None
+
+
+class RequestCoordinator:
+    """
+    Lets identical PDOK requests running at the same time in this process
+    share one job and one downloaded archive.
+
+    The first caller for a key runs the download; callers arriving while it
+    runs wait for it and get their own hard link (or copy) of the archive in
+    their own directory, so every caller can clip, cache and clean up its
+    copy independently. When the shared download fails, waiting callers run
+    their own. All methods are thread-safe.
+    """
+
+    WAIT_INTERVAL = 0.5  # Seconds between cancellation checks while waiting
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    @staticmethod
+    def make_key(base_url, geofilter, featuretypes, data_format):
+        """
+        Key of a request, from its normalised geofilter, featuretypes and format.
+        """
+        raw = json.dumps({
+            'base_url': base_url,
+            'geofilter': geofilter,
+            'featuretypes': sorted(featuretypes),
+            'format': data_format.lower(),
+        }, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def fetch(self, key, directory, download, feedback=None):
+        """
+        Return the path of the archive for ``key`` in ``directory``.
+
+        ``download`` is called with a directory and must return the path of
+        the downloaded archive, or None on failure. It runs at most once for
+        all callers of the same key that overlap in time.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.destinations[directory] = None
+
+        if leader:
+            try:
+                flight.path = download(directory)
+            finally:
+                # Hand out the copies before the leader can move or remove its archive
+                with self._lock:
+                    del self._flights[key]
+                    for destination in flight.destinations:
+                        flight.destinations[destination] = link_into(flight.path, destination)
+                flight.done.set()
+            return flight.path
+
+        if feedback is not None:
+            feedback.pushInfo("Identical request already running, waiting for its download.")
+        while not flight.done.wait(self.WAIT_INTERVAL):
+            if feedback is not None and feedback.isCanceled():
+                return None
+
+        path = flight.destinations.get(directory)
+        if path is None:
+            # The shared download failed or was canceled by its caller: try on our own
+            return download(directory)
+        return path
+
+
+_shared_coordinator = RequestCoordinator()
+
+
+def shared_coordinator():
+    """
+    Return the process-wide request coordinator.
+    """
+    return _shared_coordinator
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary QGIS libraries
+from qgis.core import QgsFields # type: ignore
+from qgis.PyQt.QtCore import QVariant, QDate, QDateTime, Qt # type: ignore
+from osgeo import gdal, ogr, osr # type: ignore
+
+# Import necessary standard libraries
+import os
+import threading
+
+# OGR field types for the QVariant types used by QGIS fields
+OGR_FIELD_TYPES = {
+    QVariant.Int: ogr.OFTInteger,
+    QVariant.LongLong: ogr.OFTInteger64,
+    QVariant.Double: ogr.OFTReal,
+    QVariant.Date: ogr.OFTDate,
+    QVariant.DateTime: ogr.OFTDateTime,
+    QVariant.Bool: ogr.OFTInteger,
+}
+
+
+def create_ogr_layer(datasource, layer_name, fields, wkb_type, crs, options):
+    """
+    Create an OGR layer with the fields of a QGIS layer.
+    """
+    srs = osr.SpatialReference()
+    srs.SetFromUserInput(crs.authid())
+    srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+
+    ogr_layer = datasource.CreateLayer(layer_name, srs, int(wkb_type), options=options)
+    add_ogr_fields(ogr_layer, fields)
+    return ogr_layer
+
+
+def add_ogr_fields(ogr_layer, fields):
+    """
+    Add QGIS fields to an OGR layer.
+    """
+    for field in fields:
+        ogr_field = ogr.FieldDefn(field.name(), OGR_FIELD_TYPES.get(field.type(), ogr.OFTString))
+        if field.type() == QVariant.Bool:
+            ogr_field.SetSubType(ogr.OFSTBoolean)
+        ogr_layer.CreateField(ogr_field)
+
+
+def write_ogr_features(ogr_layer, features, skip_unique=False):
+    """
+    Write QGIS features to an OGR layer with the same fields. Raises IOError
+    if a feature cannot be written, unless ``skip_unique`` is set and the
+    feature violates a UNIQUE constraint: such features are skipped. Returns
+    the number of features written.
+    """
+    definition = ogr_layer.GetLayerDefn()
+    written = 0
+    for feature in features:
+        ogr_feature = ogr.Feature(definition)
+        geometry = feature.geometry()
+        if not geometry.isNull():
+            ogr_feature.SetGeometryDirectly(ogr.CreateGeometryFromWkb(bytes(geometry.asWkb())))
+        for i, value in enumerate(feature.attributes()):
+            if value is None or (isinstance(value, QVariant) and value.isNull()):
+                ogr_feature.SetFieldNull(i)
+            elif isinstance(value, (QDate, QDateTime)):
+                ogr_feature.SetField(i, value.toString(Qt.ISODate))
+            else:
+                ogr_feature.SetField(i, value)
+
+        gdal.ErrorReset()
+        try:
+            error = None if ogr_layer.CreateFeature(ogr_feature) == 0 else gdal.GetLastErrorMsg()
+        except RuntimeError as e:  # GDAL exceptions are enabled
+            error = str(e)
+        if error is not None:
+            if skip_unique and 'UNIQUE constraint failed' in error:
+                continue
+            raise IOError(f"Could not write a feature to layer {ogr_layer.GetName()}: {error}")
+        written += 1
+    return written
+
+
+class GeoPackageWriter:
+    """
+    Writes several layers into a single GeoPackage over one connection.
+
+    Features are written in large transactions, committed every
+    ``commit_every`` features. Spatial indexes and the attribute indexes are
+    not maintained row by row but built once in close(). The exception is
+    ``unique_field``: it is indexed from the start, and features whose value
+    of it is stored already are skipped. All methods are thread-safe.
+    """
+
+    GEOMETRY_COLUMN = 'geom'
+    UNIQUE_LOOKUP_SIZE = 500  # Values looked up per query when skipping stored features
+
+    def __init__(self, path, index_fields=(), commit_every=100000, unique_field=None):
+        self.path = path
+        self.index_fields = index_fields
+        self.commit_every = commit_every
+        self.unique_field = unique_field
+        self._lock = threading.Lock()
+        self._layers = {}
+        self._fields = {}
+        self._pending = 0
+
+        if os.path.exists(path):
+            os.remove(path)
+        driver = ogr.GetDriverByName('GPKG')
+        self._datasource = driver.CreateDataSource(path)
+        if self._datasource is None:
+            raise IOError(f"Could not create GeoPackage: {path}")
+        self._datasource.StartTransaction()
+
+    def create_layer(self, layer_name, fields, wkb_type, crs):
+        """
+        Create a layer and return a feature sink writing to it.
+        """
+        with self._lock:
+            ogr_layer = create_ogr_layer(
+                self._datasource, layer_name, fields, wkb_type, crs,
+                ['SPATIAL_INDEX=NO', f"GEOMETRY_NAME={self.GEOMETRY_COLUMN}"]
+            )
+            self._layers[layer_name] = ogr_layer
+            self._fields[layer_name] = QgsFields(fields)
+            if self.unique_field is not None and fields.lookupField(self.unique_field) >= 0:
+                self._datasource.ExecuteSQL(f'CREATE UNIQUE INDEX "idx_{layer_name}_{self.unique_field}" ON "{layer_name}" ("{self.unique_field}")')
+            return OgrLayerSink(self, ogr_layer)
+
+    def layer_uri(self, layer_name):
+        return f"{self.path}|layername={layer_name}"
+
+    def layer_names(self):
+        return list(self._layers)
+
+    def layer_fields(self, layer_name):
+        return self._fields[layer_name]
+
+    def feature_count(self, layer_name):
+        with self._lock:
+            return self._layers[layer_name].GetFeatureCount()
+
+    def _new_features(self, ogr_layer, features):
+        """
+        Drop the features whose unique field value is stored already or
+        occurs earlier in ``features``. Values are looked up through the
+        unique index, so memory use does not grow with the layer.
+        """
+        layer_name = ogr_layer.GetName()
+        field_index = self._fields[layer_name].lookupField(self.unique_field)
+        values = {feature.attributes()[field_index] for feature in features}
+        values = [value for value in values if isinstance(value, str)]
+
+        stored = set()
+        for start in range(0, len(values), self.UNIQUE_LOOKUP_SIZE):
+            quoted = ', '.join("'" + value.replace("'", "''") + "'" for value in values[start:start + self.UNIQUE_LOOKUP_SIZE])
+            result = self._datasource.ExecuteSQL(f'SELECT "{self.unique_field}" FROM "{layer_name}" WHERE "{self.unique_field}" IN ({quoted})')
+            stored.update(result_feature.GetField(0) for result_feature in result)
+            self._datasource.ReleaseResultSet(result)
+
+        new_features = []
+        for feature in features:
+            value = feature.attributes()[field_index]
+            if isinstance(value, str):
+                if value in stored:
+                    continue
+                stored.add(value)
+            new_features.append(feature)
+        return new_features
+
+    def _write(self, ogr_layer, features):
+        with self._lock:
+            unique = self.unique_field is not None and self._fields[ogr_layer.GetName()].lookupField(self.unique_field) >= 0
+            if unique:
+                features = self._new_features(ogr_layer, features)
+            # Duplicates the lookup misses, e.g. non-text values, are rejected by the unique index and skipped
+            written = write_ogr_features(ogr_layer, features, skip_unique=unique)
+
+            # Commit in large chunks to keep the journal bounded
+            self._pending += written
+            if self._pending >= self.commit_every:
+                self._datasource.CommitTransaction()
+                self._datasource.StartTransaction()
+                self._pending = 0
+        return True
+
+    def close(self):
+        """
+        Commit the remaining features and build the indexes.
+        """
+        with self._lock:
+            if self._datasource is None:
+                return
+            self._datasource.CommitTransaction()
+
+            for layer_name, ogr_layer in self._layers.items():
+                self._datasource.ExecuteSQL(f"SELECT CreateSpatialIndex('{layer_name}', '{self.GEOMETRY_COLUMN}')")
+                definition = ogr_layer.GetLayerDefn()
+                for field_name in self.index_fields:
+                    if definition.GetFieldIndex(field_name) >= 0:
+                        self._datasource.ExecuteSQL(f'CREATE INDEX IF NOT EXISTS "idx_{layer_name}_{field_name}" ON "{layer_name}" ("{field_name}")')
+
+            self._datasource = None  # Closes the file
+
+
+class OgrLayerSink:
+    """
+    Minimal feature sink for one layer of a GeoPackageWriter or one of the
+    writers in bgt_loader_writers. Raises IOError if a write fails, so an
+    output is never silently truncated.
+    """
+
+    def __init__(self, writer, ogr_layer):
+        self.writer = writer
+        self.ogr_layer = ogr_layer
+
+    def addFeatures(self, features, flags=None):
+        return self.writer._write(self.ogr_layer, features)
+
+    def addFeature(self, feature, flags=None):
+        return self.writer._write(self.ogr_layer, [feature])
+
+
+class OgrSink:
+    """
+    Minimal feature sink writing straight to an OGR layer, e.g. inside a
+    transaction of its data source. Not thread-safe.
+    """
+
+    def __init__(self, ogr_layer):
+        self.ogr_layer = ogr_layer
+
+    def addFeatures(self, features, flags=None):
+        write_ogr_features(self.ogr_layer, features)
+        return True
+
+    def addFeature(self, feature, flags=None):
+        return self.addFeatures([feature])
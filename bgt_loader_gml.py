@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary QGIS libraries
+from qgis.core import ( # type: ignore
+    QgsCoordinateReferenceSystem,
+    QgsExpression,
+    QgsExpressionContext,
+    QgsFeature,
+    QgsField,
+    QgsFields,
+    QgsGeometry,
+    QgsWkbTypes,
+)
+
+from qgis.PyQt.QtCore import QVariant # type: ignore
+from osgeo import ogr # type: ignore
+
+# Import necessary standard libraries
+import xml.etree.ElementTree as ET
+import zipfile
+
+GML_NAMESPACES = ('http://www.opengis.net/gml', 'http://www.opengis.net/gml/3.2')
+FEATURE_MEMBER_TAGS = ('featureMember', 'featureMembers', 'member')
+
+
+def open_gml(path):
+    """
+    Open a GML file for reading, either from disk or from a zip archive
+    through a /vsizip/ path.
+    """
+    if path.startswith('/vsizip/') and '.zip/' in path:
+        zip_path, member = path[len('/vsizip/'):].split('.zip/', 1)
+        archive = zipfile.ZipFile(f"{zip_path}.zip", 'r')
+        return _ArchiveMember(archive, archive.open(member))
+    return open(path, 'rb')
+
+
+def gml_size(path):
+    """
+    Uncompressed size in bytes of a GML file on disk or in a zip archive.
+    """
+    if path.startswith('/vsizip/') and '.zip/' in path:
+        zip_path, member = path[len('/vsizip/'):].split('.zip/', 1)
+        with zipfile.ZipFile(f"{zip_path}.zip", 'r') as archive:
+            return archive.getinfo(member).file_size
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        return f.tell()
+
+
+class _ArchiveMember:
+    """
+    File object for a zip member that also closes the archive.
+    """
+
+    def __init__(self, archive, member):
+        self.archive = archive
+        self.member = member
+
+    def read(self, size=-1):
+        return self.member.read(size)
+
+    def close(self):
+        self.member.close()
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _namespace(tag):
+    return tag[1:].split('}', 1)[0] if tag.startswith('{') else ''
+
+
+class GmlLightLayer:
+    """
+    Streaming reader for PDOK gmllight files.
+
+    Features are parsed incrementally and released as soon as they are
+    yielded, so memory stays bounded regardless of the file size. The class
+    offers the parts of the QgsVectorLayer interface the clipping stage uses.
+    The first geometry property of a feature becomes its geometry; all other
+    leaf elements become string attributes.
+    """
+
+    def __init__(self, path, name, batch_size=1000):
+        self.path = path
+        self._name = name
+        self.batch_size = batch_size
+        self._crs = QgsCoordinateReferenceSystem("EPSG:28992")
+        self._fields = QgsFields()
+        self._wkb_type = QgsWkbTypes.Unknown
+        self._feature_count = 0
+        self._valid = False
+        self._subset = ''
+        self._scan()
+
+    def _scan(self):
+        """
+        Stream through the file once to collect the field names, geometry
+        type and feature count.
+        """
+        field_names = ['gml_id']
+        seen = set(field_names)
+        try:
+            for feature_element in self._feature_elements():
+                self._feature_count += 1
+                attributes, geometry_element = self._parse(feature_element)
+                for name in attributes:
+                    if name not in seen:
+                        seen.add(name)
+                        field_names.append(name)
+                if self._wkb_type == QgsWkbTypes.Unknown and geometry_element is not None:
+                    self._wkb_type = self._geometry(geometry_element).wkbType()
+        except (ET.ParseError, OSError, KeyError):
+            return
+
+        for name in field_names:
+            self._fields.append(QgsField(name, QVariant.String))
+        self._valid = True
+
+    def _feature_elements(self):
+        """
+        Yield the feature elements of the file one by one, clearing each
+        after use. Features are the children of (gml:)featureMember(s).
+        """
+        with open_gml(self.path) as source:
+            depth = 0
+            root = None
+            member = None
+            for event, element in ET.iterparse(source, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if root is None:
+                        root = element
+                    elif depth == 2:
+                        member = element if _local_name(element.tag) in FEATURE_MEMBER_TAGS else None
+                    continue
+
+                depth -= 1
+                if depth == 2 and member is not None:
+                    yield element
+                    # A featureMembers element holds all features until the end of
+                    # the file, so drop every feature once it has been used
+                    element.clear()
+                    member.remove(element)
+                elif depth == 1:
+                    # Drop the finished feature member from the tree
+                    root.clear()
+
+    def _parse(self, feature_element):
+        attributes = {}
+        geometry_element = None
+
+        gml_id = next((value for key, value in feature_element.attrib.items() if _local_name(key) == 'id'), None)
+        if gml_id is not None:
+            attributes['gml_id'] = gml_id
+
+        stack = list(feature_element)
+        while stack:
+            element = stack.pop(0)
+            if _namespace(element.tag) in GML_NAMESPACES:
+                continue  # Standard GML properties such as gml:boundedBy
+            children = list(element)
+            if children and _namespace(children[0].tag) in GML_NAMESPACES:
+                # Property holding a GML geometry
+                if geometry_element is None:
+                    geometry_element = children[0]
+            elif children:
+                stack[0:0] = children
+            elif element.text is not None and element.text.strip():
+                attributes.setdefault(_local_name(element.tag), element.text.strip())
+        return attributes, geometry_element
+
+    def _geometry(self, geometry_element):
+        ogr_geometry = ogr.CreateGeometryFromGML(ET.tostring(geometry_element, encoding='unicode'))
+        if ogr_geometry is None:
+            return QgsGeometry()
+        geometry = QgsGeometry()
+        geometry.fromWkb(bytes(ogr_geometry.ExportToIsoWkb()))
+        return geometry
+
+    def iter_batches(self, request=None):
+        """
+        Yield lists of at most ``batch_size`` features, optionally limited to
+        the filter rectangle of a QgsFeatureRequest.
+        """
+        rect = request.filterRect() if request is not None else None
+        if rect is not None and rect.isNull():
+            rect = None
+
+        # The subset expression is tested on the attributes, before the geometry is parsed
+        expression = QgsExpression(self._subset) if self._subset else None
+        context = QgsExpressionContext()
+        context.setFields(self._fields)
+        if expression is not None:
+            expression.prepare(context)
+
+        batch = []
+        feature_id = 0
+        for feature_element in self._feature_elements():
+            feature_id += 1
+            attributes, geometry_element = self._parse(feature_element)
+            feature = QgsFeature(self._fields, feature_id)
+            feature.setAttributes([attributes.get(field.name()) for field in self._fields])
+            if expression is not None:
+                context.setFeature(feature)
+                if not expression.evaluate(context):
+                    continue
+
+            geometry = self._geometry(geometry_element) if geometry_element is not None else QgsGeometry()
+            if rect is not None and (geometry.isNull() or not geometry.boundingBox().intersects(rect)):
+                continue
+            feature.setGeometry(geometry)
+            batch.append(feature)
+
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def getFeatures(self, request=None):
+        for batch in self.iter_batches(request):
+            yield from batch
+
+    def setSubsetString(self, subset):
+        """
+        Limit the features to those matching a QGIS expression.
+        """
+        self._subset = subset or ''
+        return True
+
+    def subsetString(self):
+        return self._subset
+
+    def isValid(self):
+        return self._valid
+
+    def name(self):
+        return self._name
+
+    def fields(self):
+        return self._fields
+
+    def wkbType(self):
+        return self._wkb_type
+
+    def geometryType(self):
+        return QgsWkbTypes.geometryType(self._wkb_type)
+
+    def featureCount(self):
+        return self._feature_count
+
+    def crs(self):
+        return self._crs
+
+    def setCrs(self, crs):
+        self._crs = crs
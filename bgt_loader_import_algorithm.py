@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary QGIS libraries
+from qgis.core import ( # type: ignore
+    QgsProcessing,
+    QgsProcessingAlgorithm,
+    QgsProcessingException,
+    QgsProcessingParameterFileDestination,
+    QgsProcessingParameterMultipleLayers,
+)
+
+from qgis.PyQt.QtCore import QCoreApplication # type: ignore
+
+from .bgt_loader_algorithm import BgtLoaderAlgorithm
+
+
+class BgtImportAlgorithm(QgsProcessingAlgorithm):
+    """
+    QGIS processing tool for importing downloaded BGT archives into a local
+    extract, which the download tool can clip from without PDOK.
+    """
+
+    def initAlgorithm(self, config):
+        """
+        Initialize algorithm with input parameters.
+        """
+        # Input: BGT archives (gmllight zip files), e.g. a national or provincial download
+        self.addParameter(QgsProcessingParameterMultipleLayers('archives', 'BGT-archieven (gmllight zip):', QgsProcessing.TypeFile))
+
+        # Output: GeoPackage with one spatially indexed layer per featuretype
+        self.addParameter(QgsProcessingParameterFileDestination('OUTPUT', 'Lokale BGT-extract:', fileFilter='GeoPackage (*.gpkg)'))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        zip_paths = self.parameterAsFileList(parameters, 'archives', context)
+        if not zip_paths:
+            raise QgsProcessingException("No BGT archives given.")
+        extract_path = self.parameterAsFileOutput(parameters, 'OUTPUT', context)
+
+        layer_names = BgtLoaderAlgorithm().import_extract(zip_paths, extract_path, feedback)
+        feedback.pushInfo(f"Imported layers: {', '.join(layer_names)}")
+        return {'OUTPUT': extract_path}
+
+    def name(self):
+        return 'bgtimport'
+
+    def displayName(self):
+        return self.tr('Import BGT archives into a local extract')
+
+    def tr(self, string):
+        """
+        Translate string for QGIS localization.
+        """
+        return QCoreApplication.translate('Processing', string)
+
+    def createInstance(self):
+        """
+        Create a new instance of the algorithm.
+        """
+        return BgtImportAlgorithm()
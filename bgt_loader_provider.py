@@ -32,6 +32,7 @@ __revision__ = '$Format:%H$'
 
 from qgis.core import QgsProcessingProvider
 from .bgt_loader_algorithm import BgtLoaderAlgorithm
+from .bgt_loader_import_algorithm import BgtImportAlgorithm
 from PyQt5.QtGui import QIcon
 import os
 
@@ -56,6 +57,7 @@ class BgtLoaderProvider(QgsProcessingProvider):
         Loads all algorithms belonging to this provider.
         """
         self.addAlgorithm(BgtLoaderAlgorithm())
+        self.addAlgorithm(BgtImportAlgorithm())
         # add additional algorithms here
         # self.addAlgorithm(MyOtherAlgorithm())
 
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary standard libraries
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+def peak_memory_mb():
+    """
+    Peak resident memory of the process in MB, or None where unsupported.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class RunReport:
+    """
+    Timings and counters of a single algorithm run.
+
+    Stages (request submission, queue wait, download, ...) accumulate their
+    durations, also when they run concurrently. Milestones record when
+    something first happened, such as the first finished layer. Per-layer
+    statistics keep load, clip and write times and the feature counts in and
+    out. All methods are thread-safe.
+    """
+
+    LAYER_KEYS = ('load_s', 'clip_s', 'write_s', 'features_in', 'features_out')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.stages = {}
+        self.milestones = {}
+        self.layers = {}
+        self.download_bytes = 0
+        self.finished = None
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time the enclosed block as (part of) a stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def mark(self, name):
+        """
+        Record the time since the start of the run as a milestone, unless
+        it was reached before.
+        """
+        with self._lock:
+            self.milestones.setdefault(name, time.perf_counter() - self.started)
+
+    def add_download(self, byte_count, seconds):
+        with self._lock:
+            self.download_bytes += byte_count
+            self.stages['download'] = self.stages.get('download', 0.0) + seconds
+
+    def add_layer(self, layer_name, **values):
+        """
+        Add values (see LAYER_KEYS) to the statistics of a layer.
+        """
+        with self._lock:
+            stats = self.layers.setdefault(layer_name, dict.fromkeys(self.LAYER_KEYS, 0))
+            for key, value in values.items():
+                stats[key] += value
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def as_dict(self):
+        with self._lock:
+            total = (self.finished or time.perf_counter()) - self.started
+            download_seconds = self.stages.get('download', 0.0)
+            return {
+                'started': self.started_at,
+                'total_s': round(total, 3),
+                'stages_s': {name: round(seconds, 3) for name, seconds in self.stages.items()},
+                'milestones_s': {name: round(seconds, 3) for name, seconds in self.milestones.items()},
+                'download_bytes': self.download_bytes,
+                'download_bytes_per_s': round(self.download_bytes / download_seconds) if download_seconds else None,
+                'layers': {
+                    layer_name: {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
+                    for layer_name, stats in sorted(self.layers.items())
+                },
+                'peak_memory_mb': peak_memory_mb(),
+            }
+
+    def summary(self):
+        """
+        Human-readable summary table for the processing log.
+        """
+        report = self.as_dict()
+        lines = [f"Run summary ({report['total_s']:.1f} s in total)"]
+        for name, seconds in report['stages_s'].items():
+            lines.append(f"  {name:<14} {seconds:>9.2f} s")
+        for name, seconds in report['milestones_s'].items():
+            lines.append(f"  {name:<14} {seconds:>9.2f} s after start")
+        if report['download_bytes_per_s']:
+            lines.append(f"  {'download rate':<14} {report['download_bytes_per_s'] / (1024 * 1024):>9.2f} MB/s")
+        if report['peak_memory_mb'] is not None:
+            lines.append(f"  {'peak memory':<14} {report['peak_memory_mb']:>9.0f} MB")
+
+        if report['layers']:
+            lines.append(f"  {'layer':<26} {'load s':>8} {'clip s':>8} {'write s':>8} {'in':>10} {'out':>10}")
+            for layer_name, stats in report['layers'].items():
+                lines.append(
+                    f"  {layer_name:<26} {stats['load_s']:>8.2f} {stats['clip_s']:>8.2f} {stats['write_s']:>8.2f} "
+                    f"{stats['features_in']:>10} {stats['features_out']:>10}"
+                )
+        return "\n".join(lines)
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
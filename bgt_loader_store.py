@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary standard libraries
+import json
+import os
+
+
+class BgtLocalStore:
+    """
+    Persistent GeoPackage holding the clipped BGT layers of one area, kept up
+    to date with the PDOK delta downloads.
+
+    The request the store was built for and the last applied delta are kept
+    in a JSON file next to the GeoPackage.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.metadata_path = f"{os.path.splitext(path)[0]}.json"
+
+    def exists(self):
+        return os.path.exists(self.path) and os.path.exists(self.metadata_path)
+
+    def read_metadata(self):
+        """
+        Return the stored metadata, or None if the store has none.
+        """
+        try:
+            with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_metadata(self, geofilter, featuretypes, buffer_distance, delta_id, read_filter=None, output_profile=None):
+        # Write to a temporary file first so a crash never leaves partial metadata
+        tmp_path = f"{self.metadata_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'geofilter': geofilter,
+                'featuretypes': sorted(featuretypes),
+                'buffer_distance': buffer_distance,
+                'read_filter': read_filter,
+                'output_profile': output_profile,
+                'delta_id': delta_id,
+            }, f, indent=2)
+        os.replace(tmp_path, self.metadata_path)
+
+    def matches(self, geofilter, featuretypes, buffer_distance, read_filter=None, output_profile=None):
+        """
+        Check whether the store was built for this request, including its
+        attribute filters and output geometry settings, and knows which delta
+        it is at, so it can be updated incrementally.
+        """
+        metadata = self.read_metadata()
+        if not self.exists() or metadata is None or not metadata.get('delta_id'):
+            return False
+        return (
+            metadata.get('geofilter') == geofilter
+            and metadata.get('featuretypes') == sorted(featuretypes)
+            and metadata.get('buffer_distance') == buffer_distance
+            and metadata.get('read_filter') == read_filter
+            and metadata.get('output_profile') == output_profile
+        )
+
+    def remove(self):
+        for path in (self.path, self.metadata_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def layer_uri(self, layer_name):
+        """
+        OGR data source of a layer in the store.
+        """
+        return f"{self.path}|layername={layer_name}"
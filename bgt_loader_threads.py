@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary standard libraries
+import queue
+import threading
+from concurrent.futures import Future, wait
+
+
+class LockedFeedback:
+    """
+    Wraps a QgsProcessingFeedback so worker threads can report through it.
+    QgsProcessingFeedback appends every message to its log without a lock,
+    so messages and progress are passed on one at a time. Everything else,
+    e.g. isCanceled, is passed on as it is.
+    """
+
+    def __init__(self, feedback):
+        self._feedback = feedback
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._feedback, name)
+
+    def pushInfo(self, info):
+        with self._lock:
+            self._feedback.pushInfo(info)
+
+    def pushWarning(self, warning):
+        with self._lock:
+            self._feedback.pushWarning(warning)
+
+    def pushDebugInfo(self, info):
+        with self._lock:
+            self._feedback.pushDebugInfo(info)
+
+    def reportError(self, error, fatalError=False):
+        with self._lock:
+            self._feedback.reportError(error, fatalError)
+
+    def setProgress(self, progress):
+        with self._lock:
+            self._feedback.setProgress(progress)
+
+    def setProgressText(self, text):
+        with self._lock:
+            self._feedback.setProgressText(text)
+
+
+class AlgorithmThreadCalls:
+    """
+    Runs calls of worker threads on the thread that created this object,
+    the one running the algorithm. QgsProcessingContext is not thread-safe,
+    so anything touching it, like creating output sinks, is handed over.
+
+    Handed over calls run while the algorithm thread waits for its workers
+    in wait(), so every worker pool started on that thread must be waited
+    for with it.
+    """
+
+    POLL_INTERVAL = 0.05  # Seconds between checks for handed over calls
+
+    def __init__(self):
+        self.thread_id = threading.get_ident()
+        self._calls = queue.SimpleQueue()
+
+    def call(self, function, *args):
+        """
+        Run ``function`` on the algorithm thread and return its result.
+        """
+        if threading.get_ident() == self.thread_id:
+            return function(*args)
+        future = Future()
+        self._calls.put((function, args, future))
+        return future.result()
+
+    def wait(self, futures):
+        """
+        Wait until all ``futures`` are done. On the algorithm thread, the
+        calls handed over by the workers run meanwhile.
+        """
+        on_algorithm_thread = threading.get_ident() == self.thread_id
+        pending = set(futures)
+        while pending:
+            if on_algorithm_thread:
+                self._run_calls()
+            _, pending = wait(pending, timeout=self.POLL_INTERVAL if on_algorithm_thread else None)
+
+    def _run_calls(self):
+        while True:
+            try:
+                function, args, future = self._calls.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
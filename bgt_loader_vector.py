@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary QGIS libraries
+from qgis.core import QgsAbstractGeometry, QgsGeometry # type: ignore
+from osgeo import ogr # type: ignore
+
+# Import necessary standard libraries
+import threading
+
+# Shapely 2 and NumPy are optional; without them the per-feature clip is used.
+# They are imported on first use, as importing them slows down plugin loading.
+np = None
+shapely = None
+_loaded = False
+_load_lock = threading.Lock()
+
+# Topological dimensions of points, lines and polygons
+POINT, LINE, POLYGON = 0, 1, 2
+
+
+def _load():
+    global np, shapely, _loaded
+    with _load_lock:
+        if not _loaded:
+            try:
+                import numpy as np
+                import shapely
+            except ImportError:
+                np = None
+                shapely = None
+            _loaded = True
+
+
+def available():
+    """
+    Whether the vectorised clip can be used in this environment.
+    """
+    _load()
+    return shapely is not None and int(shapely.__version__.split('.')[0]) >= 2
+
+
+def prepared_area(geometry):
+    """
+    Shapely version of a QgsGeometry, prepared for repeated predicates.
+    """
+    _load()
+    area = shapely.from_wkb(bytes(geometry.asWkb()))
+    shapely.prepare(area)
+    return area
+
+
+def ogr_wkb_batches(path, rect, batch_size, where=None, fields=()):
+    """
+    Read the FIDs, WKB geometries and the attributes named in ``fields`` of
+    the features of an OGR layer source (see _split_uri) whose bounding box
+    intersects ``rect`` and that match the ``where`` attribute filter and the
+    subset of the source, as NumPy arrays in batches, through the OGR Arrow
+    stream (GDAL 3.6+). Yields (fids, wkbs, columns),
+    with columns mapping each field found to a (masked) array, see
+    column_values. Other attributes are skipped. Returns None if the file
+    cannot be read this way.
+    """
+    _load()
+    path, options = _split_uri(path)
+    datasource = ogr.Open(path)
+    if datasource is None or datasource.GetLayerCount() == 0:
+        return None
+    if 'layername' in options:
+        ogr_layer = datasource.GetLayerByName(options['layername'])
+    else:
+        ogr_layer = datasource.GetLayer(int(options.get('layerid', 0)))
+    if ogr_layer is None or not hasattr(ogr_layer, 'GetArrowStreamAsNumPy'):
+        return None
+
+    # A subset in the source applies on top of the attribute filter
+    filters = [condition for condition in (options.get('subset'), where) if condition]
+    where = " AND ".join(f"({condition})" for condition in dict.fromkeys(filters)) or None
+
+    # Skip all attributes, except those requested and those the attribute filter needs
+    definition = ogr_layer.GetLayerDefn()
+    field_names = [definition.GetFieldDefn(i).GetName() for i in range(definition.GetFieldCount())]
+    ogr_layer.SetIgnoredFields([name for name in field_names if name not in fields and f'"{name}"' not in (where or '')])
+    if where:
+        ogr_layer.SetAttributeFilter(where)
+    ogr_layer.SetSpatialFilterRect(rect.xMinimum(), rect.yMinimum(), rect.xMaximum(), rect.yMaximum())
+    fid_column = ogr_layer.GetFIDColumn() or 'OGC_FID'
+    geometry_column = ogr_layer.GetGeometryColumn() or 'wkb_geometry'
+    read_fields = [name for name in fields if name in field_names]
+
+    def batches(datasource=datasource):  # Keeps the datasource open while iterating
+        # Masked arrays mark the null attribute values
+        stream = ogr_layer.GetArrowStreamAsNumPy(options=['INCLUDE_FID=YES', f"MAX_FEATURES_IN_BATCH={batch_size}"])
+        for batch in stream:
+            fids = np.ma.getdata(batch[fid_column])
+            columns = {name: batch[name] for name in read_fields}
+            if fid_column in fields:
+                columns[fid_column] = fids  # E.g. the fid of a GeoPackage, which QGIS lists as a field
+            yield fids, np.asarray(np.ma.getdata(batch[geometry_column]), dtype=object), columns
+
+    return batches()
+
+
+def _split_uri(uri):
+    """
+    Split an OGR layer source as QGIS writes it, e.g.
+    ``path|layername=pand|subset=...``, into the path and its options.
+    """
+    path, *parts = uri.split('|')
+    options = {}
+    for part in parts:
+        key, _, value = part.partition('=')
+        options[key.lower()] = value
+    return path, options
+
+
+def column_values(column, indices):
+    """
+    Python values of an attribute column of ogr_wkb_batches at ``indices``,
+    with None for null values. Only called for the kept features, so the
+    attributes of clipped away features are never converted.
+    """
+    mask = np.ma.getmaskarray(column)
+    data = np.ma.getdata(column)
+    values = []
+    for i in indices:
+        value = data[i]
+        if mask[i] or value is None:
+            values.append(None)
+        elif isinstance(value, bytes):
+            values.append(value.decode('utf-8'))
+        elif isinstance(value, np.generic):
+            values.append(value.item())  # Dates and times become datetime objects
+        else:
+            values.append(value)
+    return values
+
+
+def from_wkb(wkbs, curve_tolerance=0.0):
+    """
+    Parse WKB into shapely geometries. Curved geometries, which GEOS cannot
+    read, are linearised through QGIS first, deviating at most
+    ``curve_tolerance`` if it is set.
+    """
+    _load()
+    geometries = shapely.from_wkb(wkbs, on_invalid='ignore')
+    for i in np.nonzero(shapely.is_missing(geometries))[0]:
+        if wkbs[i] is None:
+            continue
+        geometry = QgsGeometry()
+        geometry.fromWkb(bytes(wkbs[i]))
+        if curve_tolerance > 0:
+            geometry.convertToStraightSegment(curve_tolerance, QgsAbstractGeometry.MaximumDifference)
+        else:
+            geometry.convertToStraightSegment()
+        geometries[i] = shapely.from_wkb(bytes(geometry.asWkb()))
+    return geometries
+
+
+def clip_to_areas(wkbs, areas, dimension, multi, grid_size=0.0, curve_tolerance=0.0):
+    """
+    Clip an array of WKB geometries to each of several prepared shapely
+    areas. The geometries are parsed once, and with several areas only
+    those whose bounding box touches an area, found through an STRtree,
+    are clipped to it.
+
+    Geometries of a lower dimension than ``dimension`` that result from
+    touching the boundary are dropped, and with ``multi`` every result is a
+    multi type; otherwise every part is returned separately. With
+    ``grid_size`` the results are snapped to that grid, dropping duplicate
+    vertices and collapsed parts. Yields (area index, input indices, clipped
+    WKB) for every area with results, with the index of the input geometry
+    of every result.
+    """
+    _load()
+    geometries = from_wkb(wkbs, curve_tolerance)
+    tree = shapely.STRtree(geometries) if len(areas) > 1 else None
+    for area_index, area in enumerate(areas):
+        candidates = np.arange(len(geometries)) if tree is None else np.sort(tree.query(area))
+        kept, clipped_wkbs = _clip_geometries(geometries[candidates], area, dimension, multi, grid_size)
+        if len(kept):
+            yield area_index, candidates[kept], clipped_wkbs
+
+
+def _clip_geometries(geometries, area, dimension, multi, grid_size):
+    hits = np.nonzero(shapely.intersects(area, geometries))[0]
+    geometries = geometries[hits]
+
+    # Only geometries crossing the boundary need an actual intersection
+    partial = ~shapely.contains(area, geometries)
+    geometries[partial] = shapely.intersection(geometries[partial], area)
+
+    # Drop parts of a lower dimension, and with them geometries left empty
+    parts, part_index = shapely.get_parts(geometries, return_index=True)
+    if grid_size > 0:
+        # Snapping can split a part, so explode the results once more
+        parts, snapped_index = shapely.get_parts(shapely.set_precision(parts, grid_size), return_index=True)
+        part_index = part_index[snapped_index]
+    keep = (shapely.get_dimensions(parts) == dimension) & ~shapely.is_empty(parts)
+    parts, part_index = parts[keep], part_index[keep]
+    kept = np.unique(part_index)
+    if len(kept) == 0:
+        return kept, np.empty(0, dtype=object)
+
+    if multi:
+        collect = {LINE: shapely.multilinestrings, POLYGON: shapely.multipolygons}.get(dimension, shapely.multipoints)
+        geometries = collect(parts, indices=np.searchsorted(kept, part_index))
+        return hits[kept], shapely.to_wkb(geometries)
+
+    # Every part becomes a feature of its own, pointing back to its input
+    return hits[part_index], shapely.to_wkb(parts)
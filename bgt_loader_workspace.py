@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary standard libraries
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+SCRATCH_DIR_ENV = 'BGT_LOADER_SCRATCH_DIR'  # Environment variable pointing the scratch workspaces elsewhere
+
+
+def link_into(path, directory, name=None):
+    """
+    Hard-link a file into ``directory``, or copy it where hard links are not
+    possible, and return the new path. The new file stays readable when the
+    original is removed. Returns None if the file could not be linked.
+    """
+    if path is None or not os.path.exists(path) or not os.path.isdir(directory):
+        return None
+    target = os.path.join(directory, name or os.path.basename(path))
+    if os.path.exists(target):
+        return target
+    try:
+        os.link(path, target)
+    except OSError:
+        try:
+            shutil.copy2(path, target)  # Other file system, or no hard link support
+        except OSError:
+            return None
+    return target
+
+
+def process_alive(pid):
+    """
+    Check whether a process of this host is still running. Only reliable
+    outside Windows, where signal 0 is not a no-op.
+    """
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)  # Signal 0 only checks whether the process exists
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, but belongs to another user
+    return True
+
+
+class WorkspaceFullError(OSError):
+    """
+    Raised when a file would not fit in the disk budget or on the disk.
+    """
+
+
+class Reservation:
+    """
+    Room reserved in a ScratchWorkspace for a file being written, see
+    ScratchWorkspace.reservation.
+    """
+
+    def __init__(self, workspace, byte_count, description):
+        self.workspace = workspace
+        self.remaining = byte_count  # Reserved bytes not written yet
+        self.description = description
+
+    def claim(self, byte_count):
+        """
+        Account for ``byte_count`` bytes about to be written. Raises
+        WorkspaceFullError if they exceed the reservation and do not fit.
+        """
+        self.workspace._claim(self, byte_count)
+
+
+class ScratchWorkspace:
+    """
+    Scratch directory of a single run, holding downloaded archives and any
+    other intermediate files.
+
+    Large writes reserve their size first, so they fail before they start
+    when they would exceed the disk budget or the free disk space. An owner
+    file records the process, so workspaces left behind by crashed runs can
+    be swept by later runs. All methods are thread-safe.
+    """
+
+    PREFIX = 'bgt_loader_'
+    OWNER_FILE = 'owner.json'
+    ORPHAN_AGE = 24 * 3600  # Seconds after which a workspace of unknown state is considered orphaned
+
+    def __init__(self, root=None, budget_bytes=0):
+        self.root = root or os.environ.get(SCRATCH_DIR_ENV) or tempfile.gettempdir()
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._reserved = 0
+
+        os.makedirs(self.root, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=self.PREFIX, dir=self.root)
+        with open(os.path.join(self.path, self.OWNER_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'pid': os.getpid(), 'host': socket.gethostname(), 'started': time.time()}, f)
+
+    def usage(self):
+        """
+        Bytes currently used by the files in the workspace.
+        """
+        total = 0
+        for directory, _, file_names in os.walk(self.path):
+            for file_name in file_names:
+                try:
+                    total += os.path.getsize(os.path.join(directory, file_name))
+                except OSError:
+                    pass  # Removed while walking
+        return total
+
+    @contextmanager
+    def reservation(self, byte_count, description):
+        """
+        Reserve room for a file of ``byte_count`` bytes while it is written.
+        Yields a Reservation, to which the writer claims every chunk before
+        writing it. Raises WorkspaceFullError if the file does not fit in the
+        budget or on disk, up front or, for a file of unknown size, as soon
+        as a chunk beyond the reserved bytes does not fit.
+        """
+        with self._lock:
+            self._check_room(byte_count, description)
+            self._reserved += byte_count
+        reservation = Reservation(self, byte_count, description)
+        try:
+            yield reservation
+        finally:
+            with self._lock:
+                self._reserved -= reservation.remaining
+
+    def _claim(self, reservation, byte_count):
+        """
+        Take ``byte_count`` bytes about to be written from a reservation.
+        Once on disk they count in usage(), so they leave the reserved
+        total; bytes beyond the reservation are checked first.
+        """
+        with self._lock:
+            excess = byte_count - reservation.remaining
+            if excess > 0:
+                self._check_room(excess, reservation.description)
+            taken = min(byte_count, reservation.remaining)
+            reservation.remaining -= taken
+            self._reserved -= taken
+
+    def _check_room(self, byte_count, description):
+        if self.budget_bytes and self.usage() + self._reserved + byte_count > self.budget_bytes:
+            raise WorkspaceFullError(
+                f"{description} needs {byte_count / (1024 * 1024):.0f} MB more, which exceeds the scratch "
+                f"budget of {self.budget_bytes / (1024 * 1024):.0f} MB in {self.path}."
+            )
+        free = shutil.disk_usage(self.path).free - self._reserved
+        if byte_count > free:
+            raise WorkspaceFullError(
+                f"{description} needs {byte_count / (1024 * 1024):.0f} MB more, but only "
+                f"{max(free, 0) / (1024 * 1024):.0f} MB is free in {self.root}."
+            )
+
+    def cleanup(self):
+        """
+        Remove the workspace. Files still held open (e.g. on Windows) are
+        left behind and removed by a later sweep. Returns True if everything
+        was removed.
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+        return not os.path.exists(self.path)
+
+    @classmethod
+    def sweep_orphans(cls, root=None, max_age=None):
+        """
+        Remove workspaces of runs that are no longer active: those whose
+        process has ended, or, where that cannot be checked, that are older
+        than ``max_age`` seconds. Returns the removed paths.
+        """
+        root = root or os.environ.get(SCRATCH_DIR_ENV) or tempfile.gettempdir()
+        max_age = cls.ORPHAN_AGE if max_age is None else max_age
+        host = socket.gethostname()
+
+        removed = []
+        try:
+            names = [name for name in os.listdir(root) if name.startswith(cls.PREFIX)]
+        except OSError:
+            return removed
+
+        for name in names:
+            path = os.path.join(root, name)
+            if not os.path.isdir(path):
+                continue
+            try:
+                with open(os.path.join(path, cls.OWNER_FILE), 'r', encoding='utf-8') as f:
+                    owner = json.load(f)
+            except (OSError, ValueError):
+                owner = None
+
+            if owner is not None and owner.get('host') == host and os.name != 'nt':
+                orphaned = not process_alive(owner.get('pid'))
+            else:
+                # Other hosts sharing the directory, Windows and unreadable owners: go by age
+                try:
+                    orphaned = time.time() - os.path.getmtime(path) > max_age
+                except OSError:
+                    continue
+
+            if orphaned:
+                shutil.rmtree(path, ignore_errors=True)
+                if not os.path.exists(path):
+                    removed.append(path)
+        return removed
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ BgtLoader
+                                 A QGIS processing tool
+ This tool helps downloading the Dutch BGT-data within a selected polygon area.
+                              -------------------
+        begin                : 2024-10-08
+        copyright            : (C) 2024 by Max van der Waal
+        email                : m.vanderwaal@tudelft.nl
+ ***************************************************************************/
+"""
+
+# Import necessary QGIS libraries
+from qgis.core import QgsFields # type: ignore
+from osgeo import ogr # type: ignore
+
+# Import necessary standard libraries
+import os
+import threading
+
+from .bgt_loader_geopackage import OgrLayerSink, create_ogr_layer, write_ogr_features
+
+
+class DirectoryWriter:
+    """
+    Writes every layer to its own file in a directory through an OGR driver.
+
+    Each layer has its own data source and lock, so workers writing
+    different layers do not wait for each other. Files are finalised,
+    including any spatial index, in close(). Offers the same interface as
+    GeoPackageWriter.
+    """
+
+    DRIVER = None
+    EXTENSION = None
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._datasources = {}
+        self._layers = {}
+        self._layer_locks = {}
+        self._fields = {}
+
+        driver = ogr.GetDriverByName(self.DRIVER)
+        if driver is None:
+            raise IOError(f"GDAL was built without the {self.DRIVER} driver.")
+        self._driver = driver
+        os.makedirs(directory, exist_ok=True)
+
+    def layer_options(self):
+        """
+        Layer creation options of the driver.
+        """
+        return []
+
+    def create_layer(self, layer_name, fields, wkb_type, crs):
+        """
+        Create a layer file and return a feature sink writing to it.
+        """
+        path = self.layer_uri(layer_name)
+        with self._lock:
+            if os.path.exists(path):
+                self._driver.DeleteDataSource(path)
+            datasource = self._driver.CreateDataSource(path)
+            if datasource is None:
+                raise IOError(f"Could not create {self.DRIVER} file: {path}")
+            ogr_layer = create_ogr_layer(datasource, layer_name, fields, wkb_type, crs, self.layer_options())
+
+            self._datasources[layer_name] = datasource
+            self._layers[layer_name] = ogr_layer
+            self._layer_locks[ogr_layer.GetName()] = threading.Lock()
+            self._fields[layer_name] = QgsFields(fields)
+            return OgrLayerSink(self, ogr_layer)
+
+    def layer_uri(self, layer_name):
+        return os.path.join(self.directory, f"{layer_name}.{self.EXTENSION}")
+
+    def layer_names(self):
+        return list(self._fields)  # Still listed after close()
+
+    def layer_fields(self, layer_name):
+        return self._fields[layer_name]
+
+    def _write(self, ogr_layer, features):
+        with self._layer_locks[ogr_layer.GetName()]:
+            write_ogr_features(ogr_layer, features)
+        return True
+
+    def close(self):
+        """
+        Finalise all files. The layers stay listed, so they can be loaded
+        once the files are complete.
+        """
+        with self._lock:
+            self._layers.clear()
+            self._datasources.clear()  # Closing a data source writes its index and footer
+
+
+class FlatGeobufWriter(DirectoryWriter):
+    """
+    Writes FlatGeobuf files with a packed Hilbert R-tree, so readers can
+    stream just the features of a region, also over HTTP range requests.
+    """
+
+    DRIVER = 'FlatGeobuf'
+    EXTENSION = 'fgb'
+
+    def layer_options(self):
+        return ['SPATIAL_INDEX=YES']
+
+
+class GeoParquetWriter(DirectoryWriter):
+    """
+    Writes compressed GeoParquet files in row groups of ``row_group_size``
+    features, so readers can fetch just the columns and row groups they need.
+    """
+
+    DRIVER = 'Parquet'
+    EXTENSION = 'parquet'
+
+    def __init__(self, directory, row_group_size=65536, compression='ZSTD'):
+        self.row_group_size = row_group_size
+        self.compression = compression
+        super().__init__(directory)
+
+    def layer_options(self):
+        return [
+            f"COMPRESSION={self.compression}",
+            f"ROW_GROUP_SIZE={self.row_group_size}",
+            'GEOMETRY_ENCODING=WKB',
+            'WRITE_COVERING_BBOX=YES',  # Per-row bounding boxes for spatial filtering (GDAL 3.9+)
+        ]